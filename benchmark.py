@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Volvo API client benchmark
+==========================
+
+Record a cassette from the in-process mock API, then replay it through the
+full client stack to measure throughput and latency offline:
+
+    python benchmark.py record --cassette bench.cassette.gz --vehicles 50
+    python benchmark.py replay --cassette bench.cassette.gz --requests 5000
+
+Measure large-payload handling (bytes on the wire, peak RSS, event loop
+blocking) with and without compression and off-loop decoding:
+
+    python benchmark.py payload --compare
+
+Compare a fixed concurrency with adaptive limits against a mock upstream of
+limited capacity whose latency changes between phases:
+
+    python benchmark.py concurrency --capacity 20 --workers 200
+
+Results are printed as one JSON object so runs can be compared across commits.
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+from volvo_app.api_client import VolvoAPIClient
+from volvo_app.concurrency import AIMDLimit, AdaptiveLimiter, GradientLimit
+from volvo_app.cassette import Cassette, RecordingTransport, ReplayTransport
+from volvo_app.mock_server import MockVolvoAPI
+from volvo_app.pool import VolvoClientPool
+from volvo_app.profiling import LagMonitor
+from volvo_app.tracing import RingBufferExporter, tracer
+
+
+async def record(args: argparse.Namespace) -> dict:
+    """Record vehicle listing and status exchanges from the mock API."""
+    transport = RecordingTransport(MockVolvoAPI(args.vehicles, latency=args.latency))
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        async with VolvoClientPool(http_client=http_client, rate=1e9, burst=1000) as pool:
+            pool.register("bench", access_token="bench-token")
+            client = pool.get("bench")
+            vehicles = await client.get_vehicles()
+            for vehicle in vehicles.get("data", []):
+                await client.get_vehicle_status(vehicle["vin"])
+
+    transport.cassette.save(args.cassette)
+    return {"cassette": args.cassette, "exchanges": len(transport.cassette)}
+
+
+async def replay(args: argparse.Namespace) -> dict:
+    """Replay a cassette with `concurrency` workers and report latency."""
+    cassette = Cassette.load(args.cassette)
+    transport = ReplayTransport(cassette, latency_scale=args.latency_scale, loop=True)
+    latencies = []
+    spans = RingBufferExporter(maxlen=None)
+    if args.trace:
+        tracer.add_exporter(spans)
+        tracer.enable()
+
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        async with VolvoClientPool(
+            http_client=http_client, rate=1e9, burst=1000, cache_ttl=0
+        ) as pool:
+            pool.register("bench", access_token="bench-token")
+            client = pool.get("bench")
+            vehicles = await client.get_vehicles()
+            vins = [v["vin"] for v in vehicles.get("data", [])]
+            queue: asyncio.Queue = asyncio.Queue()
+            for i in range(args.requests):
+                queue.put_nowait(vins[i % len(vins)])
+
+            async def worker():
+                while not queue.empty():
+                    vin = queue.get_nowait()
+                    started = time.perf_counter()
+                    await client.get_vehicle_status(vin)
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100)
+    result = {
+        "requests": len(latencies),
+        "concurrency": args.concurrency,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(quantiles[49] * 1000, 3),
+            "p95": round(quantiles[94] * 1000, 3),
+            "p99": round(quantiles[98] * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3),
+        },
+    }
+    if args.trace:
+        result["stages_ms"] = {
+            name: {"count": s["count"], "mean": round(s["total"] / s["count"] * 1000, 3)}
+            for name, s in spans.summary().items()
+        }
+    return result
+
+
+class CountingStream(httpx.AsyncByteStream):
+    """Pass a response stream through, counting its (still encoded) bytes."""
+
+    def __init__(self, stream, transport: "CountingTransport"):
+        self.stream = stream
+        self.transport = transport
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self.transport.bytes_received += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self.stream.aclose()
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """Count response bytes as received, before content decoding."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self.inner = inner
+        self.bytes_received = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=CountingStream(response.stream, self),
+            request=request,
+        )
+
+
+async def payload(args: argparse.Namespace) -> dict:
+    """Fetch large status documents and report wire bytes, RSS and loop blocking."""
+    optimized = args.mode == "optimized"
+    api = MockVolvoAPI(args.vehicles, status_padding=args.padding, compress=True)
+    api.prime()
+    transport = CountingTransport(api)
+    monitor = LagMonitor(interval=0.001, threshold=float("inf"), history=None)
+
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        client = VolvoAPIClient(
+            http_client=http_client,
+            accept_encoding="gzip" if optimized else "identity",
+            decode_offload_threshold=args.offload_threshold if optimized else None,
+        )
+        client.access_token = "bench-token"
+        monitor_task = asyncio.ensure_future(monitor.run())
+        started = time.perf_counter()
+        statuses = 0
+        async for _, status in client.iter_vehicle_statuses(args.concurrency):
+            statuses += status is not None
+        elapsed = time.perf_counter() - started
+        monitor_task.cancel()
+
+    blocked = [lag for lag in monitor.lags if lag > 0.005]
+    return {
+        "mode": args.mode,
+        "statuses": statuses,
+        "seconds": round(elapsed, 4),
+        "bytes_on_wire": transport.bytes_received,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "loop_blocked_ms": round(sum(blocked) * 1000, 2),
+        "max_loop_lag_ms": round(monitor.max_lag * 1000, 2),
+    }
+
+
+def compare_payload(args: argparse.Namespace) -> dict:
+    """Run the payload benchmark in a fresh process per mode."""
+    results = {}
+    for mode in ("baseline", "optimized"):
+        output = subprocess.run(
+            [
+                sys.executable, __file__, "payload", "--mode", mode,
+                "--vehicles", str(args.vehicles), "--padding", str(args.padding),
+                "--concurrency", str(args.concurrency),
+                "--offload-threshold", str(args.offload_threshold),
+            ],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results[mode] = json.loads(output)
+    return results
+
+
+async def concurrency_run(args: argparse.Namespace, mode: str) -> dict:
+    """Drive `args.workers` status pollers through one limiter mode."""
+    phases = [float(ms) / 1000 for ms in args.phases.split(",")]
+    started = time.perf_counter()
+
+    def latency(request):
+        phase = int((time.perf_counter() - started) / args.phase_seconds)
+        return phases[min(phase, len(phases) - 1)]
+
+    api = MockVolvoAPI(
+        args.vehicles, latency=latency, capacity=args.capacity, max_queue=args.max_queue
+    )
+    api.prime()
+    algorithms = {"aimd": AIMDLimit, "gradient": GradientLimit}
+    limiter = AdaptiveLimiter(algorithms[mode](), "reads") if mode in algorithms else None
+    deadline = started + args.phase_seconds * len(phases)
+    latencies, failures = [], 0
+    limits, queues, busy = ([[] for _ in phases] for _ in range(3))
+
+    async with httpx.AsyncClient(transport=api) as http_client:
+        client = VolvoAPIClient(http_client=http_client, read_limiter=limiter)
+        client.access_token = "bench-token"
+
+        async def worker(i):
+            nonlocal failures
+            vin = api.vins[i % len(api.vins)]
+            while time.perf_counter() < deadline:
+                request_started = time.perf_counter()
+                if await client.get_vehicle_status(vin) is None:
+                    failures += 1
+                    # Back off briefly, as a real poller would after an error
+                    await asyncio.sleep(0.01)
+                else:
+                    latencies.append(time.perf_counter() - request_started)
+
+        async def sample():
+            while True:
+                await asyncio.sleep(0.05)
+                phase = min(int((time.perf_counter() - started) / args.phase_seconds),
+                            len(phases) - 1)
+                limits[phase].append(limiter.limit if limiter else args.workers)
+                queues[phase].append(api.queued)
+                busy[phase].append(api.inflight / args.capacity)
+
+        sampler = asyncio.ensure_future(sample())
+        await asyncio.gather(*(worker(i) for i in range(args.workers)))
+        sampler.cancel()
+        elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(sorted(latencies), n=100)
+    return {
+        "ok": len(latencies),
+        "failed": failures,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(quantiles[49] * 1000, 2),
+            "p99": round(quantiles[98] * 1000, 2),
+        },
+        # Means per latency phase
+        "limit_per_phase": [round(statistics.mean(l), 1) if l else None for l in limits],
+        "upstream_queue_per_phase": [
+            round(statistics.mean(q), 1) if q else None for q in queues
+        ],
+        "upstream_busy_per_phase": [round(statistics.mean(b), 2) if b else None for b in busy],
+    }
+
+
+async def concurrency(args: argparse.Namespace) -> dict:
+    """Compare fixed concurrency, AIMD and gradient limits."""
+    return {
+        "capacity": args.capacity,
+        "phases_ms": args.phases,
+        "fixed": await concurrency_run(args, "fixed"),
+        "aimd": await concurrency_run(args, "aimd"),
+        "gradient": await concurrency_run(args, "gradient"),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line argument parser."""
+    parser = argparse.ArgumentParser(description="Volvo API client benchmark")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Record a cassette from the mock API")
+    record_parser.add_argument("--cassette", default="bench.cassette.gz")
+    record_parser.add_argument("--vehicles", type=int, default=50)
+    record_parser.add_argument("--latency", type=float, default=0.02,
+                               help="Mock API latency in seconds")
+
+    replay_parser = subparsers.add_parser("replay", help="Replay a cassette under load")
+    replay_parser.add_argument("--cassette", default="bench.cassette.gz")
+    replay_parser.add_argument("--requests", type=int, default=5000)
+    replay_parser.add_argument("--concurrency", type=int, default=50)
+    replay_parser.add_argument("--latency-scale", type=float, default=0.0,
+                               help="0 replays instantly, 1 reproduces recorded latency")
+    replay_parser.add_argument("--trace", action="store_true",
+                               help="Report mean time per request stage")
+
+    payload_parser = subparsers.add_parser("payload", help="Benchmark large payloads")
+    payload_parser.add_argument("--mode", choices=("baseline", "optimized"),
+                                default="optimized")
+    payload_parser.add_argument("--compare", action="store_true",
+                                help="Run both modes in separate processes")
+    payload_parser.add_argument("--vehicles", type=int, default=40)
+    payload_parser.add_argument("--padding", type=int, default=20000,
+                                help="Extra entries per status document")
+    payload_parser.add_argument("--concurrency", type=int, default=8)
+    payload_parser.add_argument("--offload-threshold", type=int, default=256 * 1024)
+
+    concurrency_parser = subparsers.add_parser(
+        "concurrency", help="Compare fixed and adaptive concurrency limits"
+    )
+    concurrency_parser.add_argument("--vehicles", type=int, default=50)
+    concurrency_parser.add_argument("--workers", type=int, default=200,
+                                    help="Concurrent pollers offering load")
+    concurrency_parser.add_argument("--capacity", type=int, default=20,
+                                    help="Requests the mock upstream serves at once")
+    concurrency_parser.add_argument("--max-queue", type=int, default=100,
+                                    help="Queued requests before the mock answers 503")
+    concurrency_parser.add_argument("--phases", default="50,200,50",
+                                    help="Comma-separated mock latency per phase, in ms")
+    concurrency_parser.add_argument("--phase-seconds", type=float, default=4.0)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "payload" and args.compare:
+        result = compare_payload(args)
+    else:
+        runner = {
+            "record": record, "replay": replay, "payload": payload, "concurrency": concurrency,
+        }[args.command]
+        result = asyncio.run(runner(args))
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
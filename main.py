@@ -6,21 +6,24 @@ Volvo Car Integration App - Main Entry Point
 This is the main entry point for the Volvo car integration application.
 """
 
+import argparse
 import asyncio
 import logging
 import sys
 from typing import Optional
+import httpx
 from volvo_app.api_client import VolvoAPIClient
 from volvo_app.config import config
+from volvo_app.export import FORMATS, export_records, iter_fleet_snapshots, iter_history
 
 
-def setup_logging():
+def setup_logging(stream=sys.stdout):
     """Setup logging configuration."""
     logging.basicConfig(
         level=getattr(logging, config.LOG_LEVEL),
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
-            logging.StreamHandler(sys.stdout),
+            logging.StreamHandler(stream),
             logging.FileHandler('volvo_app.log')
         ]
     )
@@ -41,18 +44,23 @@ async def main():
         if await client.authenticate():
             logger.info("Successfully authenticated with Volvo API")
             
-            # Get vehicles
-            vehicles = await client.get_vehicles()
-            if vehicles:
-                logger.info(f"Found {len(vehicles.get('data', []))} vehicles")
-                
+            # Stream vehicles; the first VIN is usable before the list is complete
+            vin = None
+            vehicles = client.iter_vehicles()
+            try:
+                async for vin in vehicles:
+                    break
+            finally:
+                # Stops the prefetch of the next page instead of leaving it to GC
+                await vehicles.aclose()
+
+            if vin:
+                logger.info(f"Found vehicle {vin}")
+
                 # Example: Get status of first vehicle
-                if vehicles.get('data'):
-                    vin = vehicles['data'][0].get('vin')
-                    if vin:
-                        status = await client.get_vehicle_status(vin)
-                        if status:
-                            logger.info(f"Vehicle status: {status}")
+                status = await client.get_vehicle_status(vin)
+                if status:
+                    logger.info(f"Vehicle status: {status}")
             else:
                 logger.warning("No vehicles found or failed to retrieve vehicles")
         else:
@@ -66,10 +74,68 @@ async def main():
         logger.info("Application shutting down...")
 
 
-def cli():
+async def export(args: argparse.Namespace) -> int:
+    """Stream fleet snapshots or stored history to a file or stdout; return the exit code."""
+    # Logs go to stderr so they never mix with data exported to stdout
+    setup_logging(sys.stderr)
+    logger = logging.getLogger(__name__)
+
+    options = dict(
+        path=args.output,
+        fmt=args.format,
+        compression=args.compression,
+        chunk_size=args.chunk_size,
+    )
+    if args.history:
+        await export_records(iter_history(args.history), **options)
+        return 0
+
+    # One connection pool for the whole fleet instead of one client per request
+    async with httpx.AsyncClient() as http_client:
+        client = VolvoAPIClient(http_client=http_client)
+        if not await client.authenticate():
+            logger.error("Failed to authenticate with Volvo API")
+            return 1
+        await export_records(iter_fleet_snapshots(client), **options)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line argument parser."""
+    parser = argparse.ArgumentParser(description="Volvo Integration App")
+    subparsers = parser.add_subparsers(dest="command")
+
+    subparsers.add_parser("run", help="Run the application (default)")
+
+    export_parser = subparsers.add_parser(
+        "export", help="Export fleet snapshots or stored history"
+    )
+    export_parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    export_parser.add_argument(
+        "--output", "-o", default="-", help="Output file, '-' for stdout"
+    )
+    export_parser.add_argument(
+        "--compression", default=None,
+        help="'gzip' for ndjson/csv, or a Parquet codec such as 'zstd'"
+    )
+    export_parser.add_argument(
+        "--history", default=None,
+        help="Export records from an NDJSON history file instead of the live fleet"
+    )
+    export_parser.add_argument("--chunk-size", type=int, default=500)
+    return parser
+
+
+def cli(argv=None):
     """Command line interface entry point."""
+    args = build_parser().parse_args(argv)
     try:
-        asyncio.run(main())
+        if args.command == "export":
+            code = asyncio.run(export(args))
+            if code:
+                sys.exit(code)
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         print("\nApplication terminated by user.")
         sys.exit(0)
@@ -0,0 +1,77 @@
+import pytest
+from volvo_app.alerts import AlertEngine, TimerWheel, FIRING, RESOLVED
+
+
+def status(fuel="50", lock="LOCKED", engine="STOPPED"):
+    return {
+        "data": {
+            "fuelAmount": {"value": fuel, "unit": "%"},
+            "centralLock": {"value": lock},
+            "engineStatus": {"value": engine},
+        }
+    }
+
+
+@pytest.fixture
+def engine():
+    """Create an engine with a threshold and a duration rule."""
+    engine = AlertEngine(
+        [
+            {"name": "low_fuel", "when": "fuelAmount.value < 15", "clear": "fuelAmount.value >= 20"},
+            {
+                "name": "unlocked_parked",
+                "when": ["centralLock.value == UNLOCKED", "engineStatus.value == STOPPED"],
+                "for": 600,
+            },
+        ],
+        clock=lambda: 0.0,
+    )
+    engine.alerts = []
+    engine.on_alert(engine.alerts.append)
+    return engine
+
+
+def test_fires_once_with_hysteresis(engine):
+    """Test deduplicated firing and clearing only above the clear threshold."""
+    engine.update("VIN1", status(fuel="14"), now=1)
+    engine.update("VIN1", status(fuel="12"), now=2)
+    engine.update("VIN1", status(fuel="17"), now=3)
+    assert [a.state for a in engine.alerts] == [FIRING]
+
+    engine.update("VIN1", status(fuel="21"), now=4)
+    assert [a.state for a in engine.alerts] == [FIRING, RESOLVED]
+    assert engine.alerts[0].values == {"fuelAmount.value": "14"}
+
+
+def test_unchanged_status_evaluates_nothing(engine):
+    """Test that rules only run when the fields they read change."""
+    assert engine.update("VIN1", status(), now=1) == 2
+    assert engine.update("VIN1", status(), now=2) == 0
+    assert engine.update("VIN1", status(fuel="40"), now=3) == 1
+
+
+def test_duration_rule_uses_timer(engine):
+    """Test that a duration rule fires after its hold time unless cancelled."""
+    engine.update("VIN1", status(lock="UNLOCKED"), now=0)
+    engine.update("VIN2", status(lock="UNLOCKED"), now=0)
+    engine.update("VIN2", status(lock="LOCKED"), now=300)
+    engine.advance(now=599)
+    assert engine.alerts == []
+
+    engine.advance(now=601)
+    assert [(a.rule, a.vin) for a in engine.alerts] == [("unlocked_parked", "VIN1")]
+    assert engine.active() == [("unlocked_parked", "VIN1")]
+
+
+def test_timer_wheel_long_deadlines():
+    """Test timers spanning several wheel rotations."""
+    wheel = TimerWheel(tick=1.0, slots=8, start=0)
+    wheel.schedule("a", 3.5)
+    wheel.schedule("b", 20)
+    wheel.schedule("c", 5)
+    wheel.cancel("c")
+    assert wheel.advance(3) == []
+    assert wheel.advance(4) == ["a"]
+    assert wheel.advance(19) == []
+    assert wheel.advance(100) == ["b"]
+    assert len(wheel) == 0
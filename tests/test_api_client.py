@@ -1,6 +1,9 @@
+import contextlib
 import pytest
 import asyncio
-from volvo_app.api_client import VolvoAPIClient
+import httpx
+from volvo_app.api_client import VehicleListingError, VolvoAPIClient
+from volvo_app.mock_server import MockVolvoAPI, mock_vin
 
 
 @pytest.fixture
@@ -28,4 +31,87 @@ async def test_authentication_mock(api_client, monkeypatch):
     assert result is True
 
 
+@pytest.mark.asyncio
+async def test_expired_token_is_renewed(api_client, monkeypatch):
+    """Test that a token past its expiry triggers authentication."""
+    calls = []
+
+    async def authenticate():
+        calls.append(True)
+        api_client.tokens.update({"access_token": "fresh", "expires_in": 1800})
+        return True
+
+    monkeypatch.setattr(api_client, "authenticate", authenticate)
+    api_client.tokens.update({"access_token": "stale", "expires_in": 10})
+    await api_client._ensure_token()
+    assert api_client.access_token == "fresh"
+    await api_client._ensure_token()
+    assert len(calls) == 1
+
+
+@contextlib.asynccontextmanager
+async def paged_client(vehicles=25, page_size=10, latency=0.0):
+    """Yield a client over a paginated mock API, and the mock itself."""
+    transport = MockVolvoAPI(vehicles, latency=latency, page_size=page_size)
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        client = VolvoAPIClient(http_client=http_client)
+        client.access_token = "token"
+        yield client, transport
+
+
+@pytest.mark.asyncio
+async def test_iter_vehicles_follows_pagination():
+    """Test that all pages are streamed in order."""
+    async with paged_client() as (client, transport):
+        vins = [vin async for vin in client.iter_vehicles()]
+    assert vins == [mock_vin(i) for i in range(25)]
+    assert transport.requests == 3
+
+
+@pytest.mark.asyncio
+async def test_iter_vehicles_prefetches_next_page():
+    """Test that the next page is requested before the current one is consumed."""
+    async with paged_client(page_size=5) as (client, transport):
+        vehicles = client.iter_vehicles()
+        await vehicles.__anext__()
+        await asyncio.sleep(0.01)
+        assert transport.requests == 2
+        await vehicles.aclose()
+
+
+@pytest.mark.asyncio
+async def test_iter_vehicle_statuses_streams_all():
+    """Test that statuses are fetched concurrently for every VIN."""
+    async with paged_client(latency=0.001) as (client, _):
+        results = [item async for item in client.iter_vehicle_statuses(concurrency=4)]
+    assert sorted(vin for vin, _ in results) == [mock_vin(i) for i in range(25)]
+    assert all(status["data"]["vin"] == vin for vin, status in results)
+
+
+@pytest.mark.asyncio
+async def test_failed_later_page_raises():
+    """Test that a failing page after the first is not silently dropped."""
+    api = MockVolvoAPI(25, page_size=10)
+
+    async def handler(request):
+        if request.url.params.get("offset") == "20":
+            return httpx.Response(500)
+        return await api.handle_async_request(request)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        client = VolvoAPIClient(http_client=http_client)
+        client.access_token = "token"
+        assert len((await client.get_vehicles())["data"]) == 10
+
+        vins = []
+        with pytest.raises(VehicleListingError):
+            async for vin in client.iter_vehicles():
+                vins.append(vin)
+        assert len(vins) == 20
+
+        with pytest.raises(VehicleListingError):
+            async for _ in client.iter_vehicle_statuses(concurrency=4):
+                pass
+
+
 # Add more tests as needed
@@ -0,0 +1,96 @@
+import pytest
+import httpx
+from volvo_app.api_client import VolvoAPIClient
+from volvo_app.cassette import (
+    Cassette, CassetteError, RecordingTransport, ReplayTransport, Scrubber,
+)
+from volvo_app.mock_server import MockVolvoAPI, mock_vin
+
+
+async def record_cassette(vehicles=3):
+    transport = RecordingTransport(MockVolvoAPI(vehicles))
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        client = VolvoAPIClient(http_client=http_client)
+        client.access_token = "secret-token"
+        listing = await client.get_vehicles()
+        for vehicle in listing["data"]:
+            await client.get_vehicle_status(vehicle["vin"])
+    return transport.cassette
+
+
+@pytest.mark.asyncio
+async def test_recording_scrubs_vins_and_tokens(tmp_path):
+    """Test that no real VIN or token ends up in the cassette file."""
+    cassette = await record_cassette()
+    path = str(tmp_path / "fleet.cassette.gz")
+    cassette.save(path)
+
+    loaded = Cassette.load(path)
+    assert len(loaded) == 4
+    assert "YV1TEST" not in repr(loaded.interactions)
+    assert loaded.interactions[1]["k"] == (
+        "GET /connected-vehicle/v2/vehicles/XXXXXXXX000000001/status"
+    )
+
+
+@pytest.mark.asyncio
+async def test_recording_scrubs_token_responses():
+    """Test that tokens in response bodies are not recorded."""
+    def handler(request):
+        return httpx.Response(200, json={"access_token": "secret-token", "expires_in": 1800})
+
+    transport = RecordingTransport(httpx.MockTransport(handler))
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        response = await http_client.post("https://volvoid.eu.volvocars.com/as/token.oauth2")
+        assert response.json()["access_token"] == "secret-token"
+
+    dump = repr(transport.cassette.interactions)
+    assert "secret-token" not in dump
+    assert '"access_token":"<scrubbed>"' in dump.replace(" ", "")
+
+
+@pytest.mark.asyncio
+async def test_replay_accepts_real_vins():
+    """Test that requests for real VINs match their scrubbed recordings."""
+    vins = [mock_vin(1), mock_vin(2)]
+    recorder = RecordingTransport(MockVolvoAPI(3))
+    async with httpx.AsyncClient(transport=recorder) as http_client:
+        client = VolvoAPIClient(http_client=http_client)
+        client.access_token = "token"
+        for vin in vins:
+            await client.get_vehicle_status(vin)
+
+    async def replay_status(vin, scrubber=None):
+        replay = ReplayTransport(recorder.cassette, scrubber=scrubber)
+        async with httpx.AsyncClient(transport=replay) as http_client:
+            client = VolvoAPIClient(http_client=http_client)
+            client.access_token = "token"
+            return await client.get_vehicle_status(vin)
+
+    # First-seen order matches the recording
+    assert (await replay_status(vins[0]))["data"]["vin"] == "XXXXXXXX000000001"
+    pinned = Scrubber({vins[1]: "XXXXXXXX000000002"})
+    assert (await replay_status(vins[1], pinned))["data"]["vin"] == "XXXXXXXX000000002"
+
+
+@pytest.mark.asyncio
+async def test_replay_serves_recorded_exchanges():
+    """Test the client stack end to end against a replayed cassette."""
+    transport = ReplayTransport(await record_cassette(), loop=True)
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        client = VolvoAPIClient(http_client=http_client)
+        client.access_token = "other-token"
+        listing = await client.get_vehicles()
+        vin = listing["data"][2]["vin"]
+        for _ in range(3):
+            status = await client.get_vehicle_status(vin)
+            assert status["data"]["vin"] == vin
+
+
+@pytest.mark.asyncio
+async def test_replay_miss_raises():
+    """Test that unrecorded requests fail loudly instead of hitting the network."""
+    transport = ReplayTransport(Cassette())
+    async with httpx.AsyncClient(transport=transport) as http_client:
+        with pytest.raises(CassetteError):
+            await http_client.get("https://api.volvocars.com/unknown")
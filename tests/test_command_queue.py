@@ -0,0 +1,148 @@
+import contextlib
+import pytest
+import httpx
+from volvo_app.api_client import VolvoAPIClient
+from volvo_app.command_queue import CommandLog, CommandQueue, SENT, EXPIRED, FAILED
+
+
+class FlakyAPI:
+    """Mock upstream that is down for the first `failures` requests."""
+
+    def __init__(self, failures=0, status=503):
+        self.failures = failures
+        self.status = status
+        self.delivered = []
+
+    def __call__(self, request):
+        if self.failures > 0:
+            self.failures -= 1
+            return httpx.Response(self.status)
+        self.delivered.append(
+            (request.url.path.split("/")[-1], request.headers["Idempotency-Key"])
+        )
+        return httpx.Response(202)
+
+
+@contextlib.asynccontextmanager
+async def mock_client(api):
+    """Yield an API client over `api`, closing its HTTP client afterwards."""
+    async with httpx.AsyncClient(transport=httpx.MockTransport(api)) as http_client:
+        client = VolvoAPIClient(http_client=http_client)
+        client.access_token = "token"
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_commands_delivered_in_order_after_outage(tmp_path):
+    """Test retry through an outage with per-VIN ordering."""
+    api = FlakyAPI(failures=2)
+    async with mock_client(api) as client:
+        queue = CommandQueue(client, str(tmp_path / "commands.log"), retry_interval=0.01)
+        await queue.start()
+
+        ids = [await queue.submit("VIN1", command) for command in ("unlock", "lock")]
+        assert [await queue.wait(i) for i in ids] == [SENT, SENT]
+        assert [command for command, _ in api.delivered] == ["unlock", "lock"]
+        assert api.delivered[0][1] == ids[0]
+        await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_command_expires(tmp_path):
+    """Test that a command is dropped once its TTL has passed."""
+    async with mock_client(FlakyAPI(failures=1000)) as client:
+        queue = CommandQueue(client, str(tmp_path / "commands.log"), retry_interval=0.01)
+        await queue.start()
+
+        command_id = await queue.submit("VIN1", "unlock", ttl=0.05)
+        assert await queue.wait(command_id) == EXPIRED
+        assert queue.pending() == 0
+        await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_pending_commands_survive_restart(tmp_path):
+    """Test that undelivered commands are replayed by a new queue."""
+    path = str(tmp_path / "commands.log")
+    async with mock_client(FlakyAPI(failures=1000)) as client:
+        down = CommandQueue(client, path, retry_interval=10)
+        await down.start()
+        await down.submit("VIN1", "lock", idempotency_key="lock-1")
+        await down.submit("VIN2", "engine/stop")
+        await down.close()
+
+    api = FlakyAPI()
+    async with mock_client(api) as client:
+        up = CommandQueue(client, path)
+        assert await up.start() == 2
+        for task in list(up._workers.values()):
+            await task
+        assert ("lock", "lock-1") in api.delivered
+        assert len(api.delivered) == 2
+        await up.close()
+
+    async with mock_client(FlakyAPI()) as client:
+        again = CommandQueue(client, path)
+        assert await again.start() == 0
+        await again.close()
+
+
+@pytest.mark.asyncio
+async def test_rejected_command_fails_without_retry(tmp_path):
+    """Test that a 404 fails the command at once."""
+    rejected = FlakyAPI(failures=1000, status=404)
+    async with mock_client(rejected) as client:
+        queue = CommandQueue(client, str(tmp_path / "commands.log"), retry_interval=0.01)
+        await queue.start()
+        command_id = await queue.submit("UNKNOWN", "lock")
+        assert await queue.wait(command_id) == FAILED
+        assert rejected.failures == 999
+        await queue.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [401, 403, 429])
+async def test_auth_and_throttling_errors_are_retried(tmp_path, status):
+    """Test that an expired token or throttling does not lose the command."""
+    api = FlakyAPI(failures=2, status=status)
+    async with mock_client(api) as client:
+        queue = CommandQueue(client, str(tmp_path / "commands.log"), retry_interval=0.01)
+        await queue.start()
+        assert await queue.wait(await queue.submit("VIN1", "lock")) == SENT
+        assert len(api.delivered) == 1
+        await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_log_compacts_completed_commands(tmp_path):
+    """Test that completed commands do not accumulate in the log."""
+    path = tmp_path / "commands.log"
+    log = CommandLog(str(path), compact_after=10)
+    await log.open()
+    await log.append({"op": "add", "id": "kept", "vin": "VIN1"})
+    for i in range(25):
+        await log.append({"op": "add", "id": str(i), "vin": "VIN1"})
+        await log.append({"op": "done", "id": str(i), "result": SENT})
+    await log.close()
+
+    assert len(path.read_text().splitlines()) < 20
+    assert list(CommandLog(str(path)).load()) == ["kept"]
+
+
+@pytest.mark.asyncio
+async def test_failed_compaction_keeps_log_writable(tmp_path, monkeypatch):
+    """Test that appends continue on the old log if compaction fails."""
+    path = tmp_path / "commands.log"
+    log = CommandLog(str(path), compact_after=1)
+    await log.open()
+
+    def disk_full(entries):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(log, "_compact", disk_full)
+    await log.append({"op": "add", "id": "1", "vin": "VIN1"})
+    await log.append({"op": "done", "id": "1", "result": SENT})
+    await log.append({"op": "add", "id": "2", "vin": "VIN1"})
+    await log.close()
+
+    assert list(CommandLog(str(path)).load()) == ["2"]
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+import httpx
+from volvo_app.api_client import VolvoAPIClient
+from volvo_app.concurrency import AIMDLimit, AdaptiveLimiter, GradientLimit
+from volvo_app.mock_server import MockVolvoAPI, mock_vin
+
+
+def test_aimd_update():
+    """Test additive increase while busy and multiplicative decrease on drops."""
+    aimd = AIMDLimit(backoff=0.5, timeout=1.0)
+    assert aimd.update(10, 0.1, inflight=10, dropped=False) == 11
+    assert aimd.update(10, 0.1, inflight=2, dropped=False) == 10
+    assert aimd.update(10, 0.1, inflight=10, dropped=True) == 5
+    assert aimd.update(10, 2.0, inflight=10, dropped=False) == 5
+
+
+@pytest.mark.asyncio
+async def test_limiter_queues_beyond_limit():
+    """Test that callers wait for a slot and cancelled waiters free theirs."""
+    limiter = AdaptiveLimiter(AIMDLimit(initial=2, max_limit=2))
+    release = asyncio.Event()
+
+    async def call():
+        async with limiter.slot():
+            await release.wait()
+
+    tasks = [asyncio.ensure_future(call()) for _ in range(4)]
+    await asyncio.sleep(0)
+    assert limiter.metrics() == {"limit": 2, "inflight": 2, "waiting": 2, "dropped": 0}
+
+    tasks[3].cancel()
+    await asyncio.sleep(0)
+    assert limiter.metrics()["waiting"] == 1
+    tasks[2].cancel()
+    await asyncio.sleep(0)
+    assert limiter.metrics()["waiting"] == 0
+    release.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert limiter.metrics()["inflight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_gradient_limit_tracks_upstream_capacity():
+    """Test that the limit settles near what a saturated upstream can serve."""
+    api = MockVolvoAPI(vehicles=10, latency=0.02, capacity=4, max_queue=50)
+    limiter = AdaptiveLimiter(GradientLimit(initial=20), "reads")
+    async with httpx.AsyncClient(transport=api) as http_client:
+        client = VolvoAPIClient(http_client=http_client, read_limiter=limiter)
+        client.access_token = "token"
+        deadline = asyncio.get_running_loop().time() + 1.5
+
+        async def worker(i):
+            while asyncio.get_running_loop().time() < deadline:
+                assert await client.get_vehicle_status(mock_vin(i % 10)) is not None
+
+        await asyncio.gather(*(worker(i) for i in range(40)))
+
+    assert 4 <= limiter.limit <= 14
+    assert client.concurrency_metrics()["reads"]["dropped"] == 0
+
+
+@pytest.mark.asyncio
+async def test_overload_shrinks_command_limit_only():
+    """Test that 503s shrink the command limit and leave reads alone."""
+    def handler(request):
+        return httpx.Response(503 if request.method == "POST" else 200, json={"data": {}})
+
+    reads = AdaptiveLimiter(AIMDLimit(initial=10), "reads")
+    commands = AdaptiveLimiter(AIMDLimit(initial=10), "commands")
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        client = VolvoAPIClient(
+            http_client=http_client, read_limiter=reads, command_limiter=commands
+        )
+        client.access_token = "token"
+        assert await client.get_vehicle_status("VIN1") is not None
+        assert await client.lock_vehicle("VIN1") is False
+
+    metrics = client.concurrency_metrics()
+    assert metrics["reads"] == {"limit": 10, "inflight": 0, "waiting": 0, "dropped": 0}
+    assert metrics["commands"]["limit"] == 9
+    assert metrics["commands"]["dropped"] == 1
@@ -0,0 +1,72 @@
+import gzip
+import json
+import zlib
+import pytest
+import httpx
+from volvo_app.api_client import VolvoAPIClient
+from volvo_app.decoding import ACCEPT_ENCODING, _small_body, decode_json, decompress
+from volvo_app.mock_server import MockVolvoAPI, mock_vin
+
+
+def test_decompress_encodings():
+    """Test gzip, deflate and identity bodies."""
+    body = b'{"a": 1}'
+    assert decompress(gzip.compress(body), "gzip") == body
+    assert decompress(zlib.compress(body), "deflate") == body
+    assert decompress(body, "identity") == body
+    with pytest.raises(ValueError):
+        decompress(body, "compress")
+
+
+@pytest.mark.asyncio
+async def test_large_bodies_are_offloaded():
+    """Test that inline and offloaded decoding give the same result."""
+    document = {"items": list(range(1000))}
+    body = gzip.compress(json.dumps(document).encode())
+    assert await decode_json(body, "gzip", offload_threshold=None) == document
+    assert await decode_json(body, "gzip", offload_threshold=1) == document
+
+
+def test_offload_decision_uses_decoded_size():
+    """Test that highly compressible bodies are judged by their real size."""
+    small = json.dumps({"items": list(range(100))}).encode()
+    large = json.dumps({"padding": ["x" * 100] * 5000}).encode()
+    assert len(gzip.compress(large)) * 30 < len(large)
+
+    assert _small_body(gzip.compress(small), "gzip", 64 * 1024) == small
+    assert _small_body(zlib.compress(small), "deflate", 64 * 1024) == small
+    assert _small_body(small, "identity", 64 * 1024) == small
+    assert _small_body(gzip.compress(large), "gzip", 64 * 1024) is None
+    assert _small_body(zlib.compress(large), "deflate", 64 * 1024) is None
+    assert _small_body(large, "identity", 64 * 1024) is None
+
+
+@pytest.mark.asyncio
+async def test_corrupt_body_still_raises():
+    """Test that a damaged body fails to decode whichever path it takes."""
+    for threshold in (None, 1, 1 << 20):
+        with pytest.raises(zlib.error):
+            await decode_json(b"\x1f\x8b" + b"\0" * 20, "gzip", offload_threshold=threshold)
+
+
+@pytest.mark.asyncio
+async def test_client_negotiates_compression():
+    """Test that the client accepts gzip and decodes compressed statuses."""
+    seen = []
+    api = MockVolvoAPI(vehicles=1, status_padding=500, compress=True)
+
+    class Spy(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            response = await api.handle_async_request(request)
+            seen.append(
+                (request.headers["accept-encoding"], response.headers.get("content-encoding"))
+            )
+            return response
+
+    async with httpx.AsyncClient(transport=Spy()) as http_client:
+        client = VolvoAPIClient(http_client=http_client, decode_offload_threshold=1024)
+        client.access_token = "token"
+        status = await client.get_vehicle_status(mock_vin(0))
+
+    assert seen == [(ACCEPT_ENCODING, "gzip")]
+    assert len(status["data"]["diagnostics"]) == 500
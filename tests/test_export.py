@@ -0,0 +1,123 @@
+import csv
+import gzip
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+import pytest
+import httpx
+from volvo_app.api_client import VolvoAPIClient
+from volvo_app.export import export_records, iter_fleet_snapshots, iter_history
+
+
+async def make_records(n):
+    for i in range(n):
+        yield {"vin": f"VIN{i}", "status": {"fuel": {"value": i}}}
+
+
+@pytest.mark.asyncio
+async def test_ndjson_gzip_roundtrip(tmp_path):
+    """Test chunked gzip NDJSON export read back as history."""
+    path = str(tmp_path / "history.ndjson.gz")
+    count = await export_records(make_records(25), path, compression="gzip", chunk_size=10)
+    assert count == 25
+
+    with gzip.open(path, "rt") as f:
+        assert len(f.readlines()) == 25
+
+    records = [r async for r in iter_history(path)]
+    assert records[24] == {"vin": "VIN24", "status": {"fuel": {"value": 24}}}
+
+
+@pytest.mark.asyncio
+async def test_csv_flattens_records(tmp_path):
+    """Test CSV export with dotted columns."""
+    path = str(tmp_path / "fleet.csv")
+    await export_records(make_records(3), path, fmt="csv", chunk_size=2)
+
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[2] == {"vin": "VIN2", "status.fuel.value": "2"}
+
+
+async def records_with_failed_status():
+    yield {"vin": "A", "status": None}
+    yield {"vin": "B", "status": {"fuel": {"value": 7}}}
+
+
+@pytest.mark.asyncio
+async def test_csv_columns_cover_later_chunks(tmp_path):
+    """Test that keys first seen after the first chunk are not dropped."""
+    path = str(tmp_path / "fleet.csv")
+    await export_records(records_with_failed_status(), path, fmt="csv", chunk_size=1)
+
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[1] == {"vin": "B", "status": "", "status.fuel.value": "7"}
+
+
+@pytest.mark.asyncio
+async def test_parquet_widens_null_columns(tmp_path):
+    """Test that a column that is null in the first chunk takes its later type."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "fleet.parquet")
+    await export_records(records_with_failed_status(), path, fmt="parquet", chunk_size=1)
+
+    table = pq.read_table(path)
+    assert table.column("status.fuel.value").to_pylist() == [None, 7]
+
+
+async def records_with_mixed_types():
+    yield {"vin": "A", "seen": datetime(2024, 5, 1, tzinfo=timezone.utc), "odometer": 120}
+    yield {"vin": "B", "price": Decimal("1.50"), "raw": b"\x01", "odometer": "n/a"}
+
+
+@pytest.mark.asyncio
+async def test_parquet_handles_non_json_and_conflicting_types(tmp_path):
+    """Test values spooled as strings and columns with conflicting types."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "fleet.parquet")
+    await export_records(records_with_mixed_types(), path, fmt="parquet", chunk_size=1)
+
+    table = pq.read_table(path).to_pydict()
+    assert table["seen"] == ["2024-05-01 00:00:00+00:00", None]
+    assert table["price"] == [None, "1.50"]
+    assert table["odometer"] == ["120", "n/a"]
+
+
+@pytest.mark.asyncio
+async def test_unsupported_compression_creates_no_file(tmp_path):
+    """Test that a rejected text compression does not leave an open file behind."""
+    path = tmp_path / "fleet.csv"
+    with pytest.raises(ValueError):
+        await export_records(make_records(1), str(path), fmt="csv", compression="bz2")
+    assert not path.exists()
+
+
+@pytest.mark.asyncio
+async def test_parquet_export(tmp_path):
+    """Test Parquet export when pyarrow is installed."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "fleet.parquet")
+    await export_records(make_records(7), path, fmt="parquet", chunk_size=3)
+
+    table = pq.read_table(path)
+    assert table.num_rows == 7
+    assert table.column("status.fuel.value").to_pylist()[-1] == 6
+
+
+@pytest.mark.asyncio
+async def test_fleet_snapshots():
+    """Test that snapshots contain one status per vehicle."""
+    def handler(request):
+        if request.url.path.endswith("/vehicles"):
+            return httpx.Response(200, json={"data": [{"vin": "A"}, {"vin": "B"}]})
+        return httpx.Response(200, json={"data": {"vin": request.url.path.split("/")[-2]}})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        client = VolvoAPIClient(http_client=http_client)
+        client.access_token = "token"
+        snapshots = [s async for s in iter_fleet_snapshots(client)]
+
+    snapshots.sort(key=lambda s: s["vin"])
+    assert [s["vin"] for s in snapshots] == ["A", "B"]
+    assert json.dumps(snapshots[1]["status"]) == '{"data": {"vin": "B"}}'
@@ -0,0 +1,106 @@
+import asyncio
+import base64
+import hashlib
+from urllib.parse import parse_qs, urlsplit
+import pytest
+import httpx
+from volvo_app.onboarding import OnboardingService, OnboardingError
+from volvo_app.tokens import TokenStore
+
+
+def make_service(token_store, timeout=5.0):
+    """Create a service whose token endpoint checks the PKCE verifier."""
+    challenges = {}
+
+    def token_endpoint(request):
+        form = parse_qs(request.content.decode())
+        digest = hashlib.sha256(form["code_verifier"][0].encode()).digest()
+        challenge = base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+        if challenges.get(form["code"][0]) != challenge:
+            return httpx.Response(400, json={"error": "invalid_grant"})
+        return httpx.Response(
+            200, json={"access_token": f"at-{form['code'][0]}", "expires_in": 1800}
+        )
+
+    service = OnboardingService(
+        token_store,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(token_endpoint)),
+        timeout=timeout,
+    )
+    return service, challenges
+
+
+@pytest.mark.asyncio
+async def test_many_concurrent_authorizations():
+    """Test that parallel flows are correlated by state and stored per account."""
+    store = TokenStore()
+    service, challenges = make_service(store)
+
+    flows = []
+    for i in range(50):
+        url, state = service.start(f"user{i}")
+        query = parse_qs(urlsplit(url).query)
+        assert query["state"] == [state]
+        challenges[f"code{i}"] = query["code_challenge"][0]
+        flows.append((state, asyncio.create_task(service.wait(state))))
+
+    for i, (state, _) in reversed(list(enumerate(flows))):
+        status, _ = await service.handle_callback({"state": state, "code": f"code{i}"})
+        assert status == 200
+
+    tokens = await asyncio.gather(*(task for _, task in flows))
+    assert [t.access_token for t in tokens] == [f"at-code{i}" for i in range(50)]
+    assert store.get("user7").access_token == "at-code7"
+    assert service.pending_count == 0
+    await service.http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_denied_and_unknown_state():
+    """Test error callbacks and forged states."""
+    service, _ = make_service(TokenStore())
+    _, state = service.start("alice")
+    waiter = asyncio.create_task(service.wait(state))
+
+    status, body = await service.handle_callback({"state": state, "error": "access_denied"})
+    assert status == 400 and "access_denied" in body
+    with pytest.raises(OnboardingError):
+        await waiter
+
+    status, _ = await service.handle_callback({"state": "forged", "code": "x"})
+    assert status == 400
+    await service.http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_authorization_times_out():
+    """Test that an abandoned authorization fails without polling."""
+    service, _ = make_service(TokenStore(), timeout=0.01)
+    _, state = service.start("alice")
+    with pytest.raises(OnboardingError):
+        await service.wait(state)
+    assert service.pending_count == 0
+    await service.http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_token_endpoint_failures_return_400():
+    """Test that unreachable or garbled token endpoints fail the flow cleanly."""
+    def unreachable(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    def not_json(request):
+        return httpx.Response(200, text="<html>maintenance</html>")
+
+    for endpoint in (unreachable, not_json):
+        service = OnboardingService(
+            TokenStore(), http_client=httpx.AsyncClient(transport=httpx.MockTransport(endpoint))
+        )
+        _, state = service.start("alice")
+        waiter = asyncio.create_task(service.wait(state))
+
+        status, body = await service.handle_callback({"state": state, "code": "x"})
+        assert status == 400 and "Token exchange failed" in body
+        with pytest.raises(OnboardingError):
+            await waiter
+        await service.http_client.aclose()
@@ -0,0 +1,85 @@
+import pytest
+import httpx
+from volvo_app.pool import VolvoClientPool
+
+
+def make_transport(seen):
+    """Mock transport echoing the bearer token of every request."""
+    def handler(request):
+        seen.append(request.headers["Authorization"])
+        return httpx.Response(200, json={"data": [{"vin": "VIN1"}]})
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_accounts_share_transport_and_keep_own_tokens():
+    """Test that tenants share one HTTP client but not their tokens."""
+    seen = []
+    http_client = httpx.AsyncClient(transport=make_transport(seen))
+    async with VolvoClientPool(http_client=http_client, cache_ttl=0) as pool:
+        pool.register("alice", access_token="token-a")
+        pool.register("bob", access_token="token-b")
+
+        assert await pool.get("alice").get_vehicles() is not None
+        assert await pool.get("bob").get_vehicles() is not None
+        assert pool.get("alice")._http_client is pool.get("bob")._http_client
+
+    assert seen == ["Bearer token-a", "Bearer token-b"]
+    await http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cache_partition_is_per_account():
+    """Test that one account's cached response is not served to another."""
+    seen = []
+    http_client = httpx.AsyncClient(transport=make_transport(seen))
+    async with VolvoClientPool(http_client=http_client) as pool:
+        pool.register("alice", access_token="token-a")
+        pool.register("bob", access_token="token-b")
+
+        await pool.get("alice").get_vehicles()
+        await pool.get("alice").get_vehicles()
+        await pool.get("bob").get_vehicles()
+
+    assert seen == ["Bearer token-a", "Bearer token-b"]
+    await http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_keeps_tokens():
+    """Test that idle clients are evicted but rebuilt with their tokens."""
+    async with VolvoClientPool(max_active=2) as pool:
+        for name in ("a", "b", "c"):
+            pool.register(name, access_token=f"token-{name}")
+            pool.get(name)
+
+        assert pool.active_count == 2
+        assert len(pool) == 3
+        assert pool.get("a").access_token == "token-a"
+
+        with pytest.raises(KeyError):
+            pool.get("unknown")
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_budget_survives_eviction():
+    """Test that eviction and re-registration do not refill the rate budget."""
+    async with VolvoClientPool(max_active=1, rate=0.001, burst=1) as pool:
+        pool.register("a", access_token="token-a")
+        assert pool.get("a").rate_limiter.try_acquire()
+
+        pool.register("b", access_token="token-b")
+        pool.get("b")
+        pool.register("a")
+
+        assert not pool.get("a").rate_limiter.try_acquire()
+
+
+@pytest.mark.asyncio
+async def test_unregister_revokes_tokens_of_held_clients():
+    """Test that a client kept after unregister no longer sends the token."""
+    async with VolvoClientPool() as pool:
+        pool.register("a", access_token="token-a")
+        client = pool.get("a")
+        pool.unregister("a")
+        assert client.access_token is None
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import signal
+import threading
+import time
+import pytest
+from volvo_app.profiling import DiagnosticsAdmin, LagMonitor, SamplingProfiler, install_signal_toggle
+from volvo_app.concurrency import AdaptiveLimiter
+from volvo_app.sync_client import VolvoSyncClient
+from volvo_app.tracing import tracer
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_lag_monitor_detects_blocking():
+    """Test that blocking the loop is measured as a stall."""
+    monitor = LagMonitor(interval=0.005, threshold=0.05)
+    task = asyncio.ensure_future(monitor.run())
+    await asyncio.sleep(0.02)
+    busy(0.1)
+    await asyncio.sleep(0.02)
+    task.cancel()
+
+    assert monitor.stalls == 1
+    assert monitor.stats()["max_ms"] >= 90
+
+
+@pytest.mark.asyncio
+async def test_signal_toggles_profiler(tmp_path):
+    """Test that the signal starts and stops sampling and dumps the profile."""
+    path = tmp_path / "profile.txt"
+    profiler = SamplingProfiler(interval=0.001)
+    loop = asyncio.get_running_loop()
+    install_signal_toggle(profiler, str(path))
+    try:
+        os.kill(os.getpid(), signal.SIGUSR2)
+        while not profiler.running:
+            await asyncio.sleep(0.005)
+        busy(0.1)
+        os.kill(os.getpid(), signal.SIGUSR2)
+        while not path.exists():
+            await asyncio.sleep(0.005)
+    finally:
+        loop.remove_signal_handler(signal.SIGUSR2)
+
+    assert not profiler.running
+    assert "test_profiling.py:busy" in profiler.top()
+    assert "test_profiling.py:busy" in path.read_text()
+
+
+def test_profiler_follows_loop_thread():
+    """Test that a profiler made on a loop thread samples that thread."""
+    async def make_profiler(_):
+        return SamplingProfiler()
+
+    with VolvoSyncClient() as client:
+        profiler = client.call(make_profiler)
+        assert profiler.thread_id == client.loop_thread_id != threading.main_thread().ident
+    assert SamplingProfiler().thread_id == threading.main_thread().ident
+
+
+def test_admin_actions():
+    """Test switching tracing on and off through the admin actions."""
+    admin = DiagnosticsAdmin(limiters={"reads": AdaptiveLimiter()})
+    try:
+        body = admin.handle("trace/on")[1]
+        assert body["tracing"] is True
+        assert body["concurrency"]["reads"]["limit"] == 10
+        with tracer.span("probe"):
+            pass
+        status, body = admin.handle("trace/off")
+        assert (status, body["spans"]["probe"]["count"]) == (200, 1)
+        assert admin.handle("nope")[0] == 404
+    finally:
+        tracer.disable()
+        admin.close()
+    assert admin.buffer not in tracer.exporters
+
+
+@pytest.mark.asyncio
+async def test_admin_stops_profiler_off_the_loop():
+    """Test that stopping the profiler through the admin keeps the loop free."""
+    admin = DiagnosticsAdmin(SamplingProfiler(interval=0.001))
+    try:
+        await admin.ahandle("profile/start")
+        busy(0.05)
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        status, body = await admin.ahandle("profile/stop")
+        ticker.cancel()
+        assert status == 200 and "test_profiling.py:busy" in body["top"]
+        assert ticks > 0
+    finally:
+        admin.close()
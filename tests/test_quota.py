@@ -0,0 +1,96 @@
+import json
+import pytest
+import httpx
+from volvo_app.api_client import VolvoAPIClient
+from volvo_app.quota import QuotaExceededError, QuotaLedger, quota_tag
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_counts_by_endpoint_vin_and_tag():
+    """Test that calls are attributed to normalised endpoints, VINs and tags."""
+    ledger = QuotaLedger(100, clock=FakeClock())
+    ledger.record("GET", "/connected-vehicle/v2/vehicles/VIN1/doors", "acme")
+    with quota_tag("poller"):
+        ledger.record("GET", "/connected-vehicle/v2/vehicles/VIN2/doors?x=1", "acme")
+
+    assert ledger.usage("endpoint") == {"GET /connected-vehicle/v2/vehicles/{vin}/doors": 2}
+    assert ledger.usage("vin") == {"VIN1": 1, "VIN2": 1}
+    assert ledger.usage("tag") == {"": 1, "poller": 1}
+    assert ledger.remaining == 98
+
+
+def test_forecast_and_polling_interval():
+    """Test that polling slows down in proportion to the projected overshoot."""
+    clock = FakeClock(1_700_000_000.0 - 1_700_000_000.0 % 86400)  # UTC midnight
+    ledger = QuotaLedger(10000, command_reserve=0.0, clock=clock)
+    for _ in range(60):
+        ledger.record("GET", "/vehicles")
+    clock.now += 60
+
+    # One call per second projects ~86k calls, far beyond 10k
+    assert ledger.forecast() > 80000
+    interval = ledger.recommended_interval(10.0)
+    assert 80 < interval < 100
+    assert QuotaLedger(10**6, clock=clock).recommended_interval(10.0) == 10.0
+
+
+def test_forecast_forgets_old_traffic_and_survives_restart(tmp_path):
+    """Test that idle periods cool the forecast and restarts keep the rate."""
+    clock = FakeClock(1_700_000_000.0 - 1_700_000_000.0 % 86400)  # UTC midnight
+    path = str(tmp_path / "quota.json")
+    ledger = QuotaLedger(10**6, path=path, clock=clock)
+    for _ in range(60):
+        ledger.record("GET", "/vehicles")
+    clock.now += 60
+    ledger.save()
+
+    restarted = QuotaLedger(10**6, path=path, clock=clock)
+    assert restarted.rate() == ledger.rate() > 0
+    assert restarted.forecast() > 80000
+
+    clock.now += 2 * 3600
+    assert ledger.rate() == restarted.rate() == 0.0
+    assert ledger.forecast() == 60
+
+
+def test_reserve_and_day_rollover(tmp_path):
+    """Test the command reserve, persistence and reset at UTC midnight."""
+    clock = FakeClock()
+    path = str(tmp_path / "quota.json")
+    ledger = QuotaLedger(20, path=path, command_reserve=0.1, clock=clock)
+    for _ in range(18):
+        ledger.record("GET", "/vehicles")
+    with pytest.raises(QuotaExceededError):
+        ledger.check()
+    ledger.check(command=True)
+    ledger.save()
+
+    assert QuotaLedger(20, path=path, clock=clock).used == 18
+    clock.now += 86400
+    assert QuotaLedger(20, path=path, clock=clock).used == 0
+    assert ledger.remaining == 20
+
+
+@pytest.mark.asyncio
+async def test_client_stops_reads_when_quota_exhausted():
+    """Test that the client counts calls and stops before the quota is exceeded."""
+    def handler(request):
+        return httpx.Response(200, json={"data": []})
+
+    ledger = QuotaLedger(2, command_reserve=0.0)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        client = VolvoAPIClient(http_client=http_client, quota=ledger, tenant="acme")
+        client.access_token = "token"
+        assert await client.get_vehicles() == {"data": []}
+        assert await client.get_vehicles() == {"data": []}
+        assert await client.get_vehicles() is None
+
+    assert ledger.usage("tenant") == {"acme": 2}
+    assert json.loads(json.dumps(ledger.snapshot()))["used"] == 2
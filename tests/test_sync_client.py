@@ -0,0 +1,107 @@
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError
+import pytest
+import httpx
+from volvo_app.mock_server import MockVolvoAPI, mock_vin
+from volvo_app.pool import VolvoClientPool
+from volvo_app.sync_client import VolvoSyncClient
+
+
+class MockSyncClient(VolvoSyncClient):
+    """Sync client over a mock transport, closed on the loop that used it."""
+
+    def __init__(self, transport, timeout=None, **pool_options):
+        self.http_client = httpx.AsyncClient(transport=transport)
+        pool = VolvoClientPool(http_client=self.http_client, **pool_options)
+        pool.register("default", access_token="token")
+        super().__init__(pool=pool, timeout=timeout)
+
+    async def _shutdown(self):
+        await super()._shutdown()
+        await self.http_client.aclose()
+
+
+@pytest.fixture
+def sync_client():
+    """Create a sync client backed by the mock API."""
+    with MockSyncClient(MockVolvoAPI(vehicles=5), rate=1e6, burst=1000, cache_ttl=0) as client:
+        yield client
+
+
+def test_blocking_calls(sync_client):
+    """Test that blocking methods return the async client's results."""
+    vehicles = sync_client.get_vehicles()
+    assert len(vehicles["data"]) == 5
+    assert sync_client.lock_vehicle(mock_vin(0)) is True
+
+
+def test_concurrent_threads_share_one_loop(sync_client):
+    """Test calls from many threads at once."""
+    vins = [mock_vin(i % 5) for i in range(200)]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        statuses = list(executor.map(sync_client.get_vehicle_status, vins))
+
+    assert [s["data"]["vin"] for s in statuses] == vins
+
+
+def test_closed_client_rejects_calls():
+    """Test that a closed facade refuses further calls."""
+    client = VolvoSyncClient()
+    client.close()
+    client.close()
+    with pytest.raises(RuntimeError):
+        client.get_vehicles()
+
+
+class CompletionTransport(httpx.AsyncBaseTransport):
+    """Record requests the mock API finished serving."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.completed = []
+
+    async def handle_async_request(self, request):
+        response = await self.inner.handle_async_request(request)
+        self.completed.append(request.method)
+        return response
+
+
+def slow_api(latency, timeout):
+    """Create a sync client over a mock API with `latency`, and its transport."""
+    transport = CompletionTransport(MockVolvoAPI(vehicles=1, latency=latency))
+    return MockSyncClient(transport, timeout=timeout, cache_ttl=0), transport
+
+
+def test_timed_out_command_is_cancelled():
+    """Test that a command is not sent after its caller timed out."""
+    client, transport = slow_api(latency=0.3, timeout=0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            client.unlock_vehicle(mock_vin(0))
+        time.sleep(0.5)
+        assert transport.completed == []
+    finally:
+        client.close()
+
+
+def test_close_waits_for_calls_in_flight():
+    """Test that close lets a running call finish instead of stranding it."""
+    client, _ = slow_api(latency=0.2, timeout=2.0)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        status = executor.submit(client.get_vehicle_status, mock_vin(0))
+        time.sleep(0.05)
+        client.close()
+        assert status.result(timeout=1)["data"]["vin"] == mock_vin(0)
+
+
+def test_close_cancels_calls_past_timeout():
+    """Test that callers are released when close gives up waiting."""
+    client, _ = slow_api(latency=5.0, timeout=None)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        status = executor.submit(client.get_vehicle_status, mock_vin(0))
+        time.sleep(0.05)
+        # Bounds how long close waits; the call itself was made without a timeout
+        client.timeout = 0.1
+        client.close()
+        with pytest.raises(CancelledError):
+            status.result(timeout=1)
@@ -0,0 +1,93 @@
+import json
+import pytest
+import httpx
+from volvo_app.api_client import VolvoAPIClient
+from volvo_app.ratelimit import RateLimiter
+from volvo_app.tracing import JSONFileExporter, OTLPExporter, RingBufferExporter, tracer
+
+
+@pytest.fixture
+def spans():
+    exporter = RingBufferExporter()
+    tracer.add_exporter(exporter)
+    tracer.enable()
+    yield exporter
+    tracer.disable()
+    tracer.remove_exporter(exporter)
+
+
+def test_disabled_tracer_is_noop():
+    """Test that spans are not created while tracing is off."""
+    exporter = RingBufferExporter()
+    tracer.add_exporter(exporter)
+    try:
+        with tracer.span("idle") as span:
+            span.set_attribute("ignored", True)
+    finally:
+        tracer.remove_exporter(exporter)
+    assert exporter.spans() == []
+
+
+@pytest.mark.asyncio
+async def test_request_stages_are_traced(spans):
+    """Test that a status fetch records nested request stage spans."""
+    def handler(request):
+        return httpx.Response(200, json={"data": {}})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+        client = VolvoAPIClient(http_client=http_client, rate_limiter=RateLimiter(100, 10))
+        client.access_token = "token"
+        await client.get_vehicle_status("VIN1")
+
+    request, = spans.spans("volvo.request")
+    assert request.attributes["path"].endswith("/VIN1/status")
+    children = {s.name: s for s in spans.spans() if s.parent_id == request.span_id}
+    assert set(children) == {"volvo.rate_limit_wait", "volvo.network"}
+    assert children["volvo.network"].attributes["http.status_code"] == 200
+    get, = spans.spans("volvo.get")
+    assert request.parent_id == get.span_id
+    assert spans.spans("volvo.decode")[0].parent_id == get.span_id
+
+
+def test_errors_are_recorded(spans, tmp_path):
+    """Test that exceptions mark the span and are written by the file exporter."""
+    path = str(tmp_path / "spans.ndjson")
+    exporter = JSONFileExporter(path)
+    tracer.add_exporter(exporter)
+    try:
+        with pytest.raises(ValueError):
+            with tracer.span("failing", vin="VIN1"):
+                raise ValueError("boom")
+    finally:
+        tracer.remove_exporter(exporter)
+        exporter.close()
+
+    with open(path) as f:
+        record = json.loads(f.readline())
+    assert record["error"] == "ValueError: boom"
+    assert record["attributes"] == {"vin": "VIN1"}
+
+
+@pytest.mark.asyncio
+async def test_otlp_export(spans):
+    """Test that buffered spans are posted as OTLP JSON."""
+    received = []
+
+    def handler(request):
+        received.append(json.loads(request.content))
+        return httpx.Response(200, json={})
+
+    exporter = OTLPExporter(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    tracer.add_exporter(exporter)
+    try:
+        with tracer.span("outer"):
+            with tracer.span("inner", attempt=2):
+                pass
+        assert await exporter.flush() == 2
+    finally:
+        tracer.remove_exporter(exporter)
+        await exporter.http_client.aclose()
+
+    inner, outer = received[0]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert inner["parentSpanId"] == outer["spanId"]
+    assert inner["attributes"] == [{"key": "attempt", "value": {"intValue": "2"}}]
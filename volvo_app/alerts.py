@@ -0,0 +1,270 @@
+"""
+Incremental alert rules evaluated on vehicle status changes.
+
+Rules are declared as plain dicts and compiled once::
+
+    {"name": "low_fuel", "when": "fuelAmount.value < 15", "clear": "fuelAmount.value >= 20"}
+    {"name": "unlocked_parked",
+     "when": ["centralLock.value == UNLOCKED", "engineStatus.value == STOPPED"],
+     "for": 600}
+
+Field paths are dotted keys into the status document (below its "data"
+wrapper). Each rule is indexed by the fields it reads and is only evaluated
+for a VIN when one of those fields changes. Rules with a "for" duration are
+armed on a timer wheel instead of being re-checked on every poll. An alert
+fires once when its condition becomes true and resolves once its "clear"
+condition (by default: the negation of "when") holds, which gives
+hysteresis when the two thresholds differ.
+"""
+
+import asyncio
+import logging
+import math
+import operator
+import time
+from typing import Optional, Dict, Any, List, Set, Tuple, Callable, NamedTuple, Union
+from .tracing import tracer
+from .utils import flatten_dict
+
+
+FIRING = "firing"
+RESOLVED = "resolved"
+
+_OPERATORS = {
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    ">": operator.gt,
+}
+_ORDERING = {"<", "<=", ">", ">="}
+
+logger = logging.getLogger(__name__)
+
+
+class Alert(NamedTuple):
+    """A firing or resolved alert for one vehicle."""
+
+    rule: str
+    vin: str
+    state: str
+    timestamp: float
+    values: Dict[str, Any]
+
+
+def _parse_literal(text: str) -> Any:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"":
+        return text[1:-1]
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+class Condition:
+    """A single `<field> <op> <literal>` comparison."""
+
+    __slots__ = ("field", "op", "value", "_fn")
+
+    def __init__(self, expression: str):
+        for op in _OPERATORS:
+            field, sep, literal = expression.partition(f" {op} ")
+            if sep:
+                self.field = field.strip()
+                self.op = op
+                self.value = _parse_literal(literal)
+                self._fn = _OPERATORS[op]
+                return
+        raise ValueError(f"Invalid condition: {expression!r}")
+
+    def __call__(self, values: Dict[str, Any]) -> bool:
+        actual = values.get(self.field)
+        if actual is None:
+            return False
+        expected = self.value
+        if isinstance(expected, float):
+            try:
+                actual = float(actual)
+            except (TypeError, ValueError):
+                return False
+        elif self.op in _ORDERING:
+            return False
+        else:
+            actual = str(actual)
+        return self._fn(actual, expected)
+
+
+def _conditions(spec: Union[str, List[str], None]) -> List[Condition]:
+    if spec is None:
+        return []
+    if isinstance(spec, str):
+        spec = [spec]
+    return [Condition(expression) for expression in spec]
+
+
+class Rule:
+    """A compiled alert rule."""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.name: str = spec["name"]
+        self.when = _conditions(spec["when"])
+        if not self.when:
+            raise ValueError(f"Rule {self.name} has no conditions")
+        self.clear = _conditions(spec.get("clear"))
+        self.for_seconds = float(spec.get("for", 0))
+        self.fields: Set[str] = {c.field for c in self.when + self.clear}
+
+    def matches(self, values: Dict[str, Any]) -> bool:
+        return all(condition(values) for condition in self.when)
+
+    def cleared(self, values: Dict[str, Any]) -> bool:
+        if self.clear:
+            return all(condition(values) for condition in self.clear)
+        return not self.matches(values)
+
+
+class TimerWheel:
+    """Hashed timer wheel; scheduling and cancelling are O(1)."""
+
+    def __init__(self, tick: float = 1.0, slots: int = 512, start: Optional[float] = None):
+        self.tick = tick
+        self._slots: List[Dict[Any, int]] = [{} for _ in range(slots)]
+        self._where: Dict[Any, int] = {}
+        self._current = int((start if start is not None else time.monotonic()) // tick)
+
+    def schedule(self, key: Any, deadline: float) -> None:
+        """Schedule `key` to expire at `deadline`, replacing any earlier timer."""
+        self.cancel(key)
+        # Round up so a timer never fires before its deadline
+        tick = max(math.ceil(deadline / self.tick), self._current + 1)
+        slot = tick % len(self._slots)
+        self._slots[slot][key] = tick
+        self._where[key] = slot
+
+    def cancel(self, key: Any) -> None:
+        slot = self._where.pop(key, None)
+        if slot is not None:
+            self._slots[slot].pop(key, None)
+
+    def advance(self, now: float) -> List[Any]:
+        """Move the wheel to `now` and return the keys that expired."""
+        expired = []
+        target = int(now // self.tick)
+        steps = min(target - self._current, len(self._slots))
+        for offset in range(1, steps + 1):
+            slot = self._slots[(self._current + offset) % len(self._slots)]
+            for key, tick in list(slot.items()):
+                if tick <= target:
+                    del slot[key]
+                    del self._where[key]
+                    expired.append(key)
+        self._current = max(self._current, target)
+        return expired
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+
+class AlertEngine:
+    """Evaluate compiled rules incrementally as vehicle statuses change."""
+
+    def __init__(
+        self,
+        rules: List[Dict[str, Any]],
+        tick: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rules = [Rule(spec) for spec in rules]
+        self.clock = clock
+        self._index: Dict[str, List[Rule]] = {}
+        for rule in self.rules:
+            for field in rule.fields:
+                self._index.setdefault(field, []).append(rule)
+        self._values: Dict[str, Dict[str, Any]] = {}
+        self._states: Dict[Tuple[str, str], str] = {}
+        self._rules_by_name = {rule.name: rule for rule in self.rules}
+        self.timers = TimerWheel(tick, start=clock())
+        self.callbacks: List[Callable[[Alert], Any]] = []
+
+    def on_alert(self, callback: Callable[[Alert], Any]) -> None:
+        """Register a callback invoked for every firing and resolved alert."""
+        self.callbacks.append(callback)
+
+    def _emit(self, rule: Rule, vin: str, state: str, now: float) -> None:
+        values = self._values.get(vin, {})
+        alert = Alert(rule.name, vin, state, now, {f: values.get(f) for f in rule.fields})
+        for callback in self.callbacks:
+            try:
+                with tracer.span("alerts.callback", rule=rule.name):
+                    callback(alert)
+            except Exception as e:
+                logger.error(f"Alert callback failed for {rule.name}: {e}")
+
+    def update(self, vin: str, status: Dict[str, Any], now: Optional[float] = None) -> int:
+        """Ingest a status document; return the number of rules evaluated."""
+        now = self.clock() if now is None else now
+        data = status.get("data", status) if isinstance(status, dict) else {}
+        flat = flatten_dict(data) if isinstance(data, dict) else {}
+        values = self._values.setdefault(vin, {})
+
+        dirty: Dict[str, Rule] = {}
+        for field, rules in self._index.items():
+            value = flat.get(field)
+            if values.get(field) != value:
+                values[field] = value
+                for rule in rules:
+                    dirty[rule.name] = rule
+
+        for rule in dirty.values():
+            self._evaluate(rule, vin, values, now)
+        self._fire_due(now)
+        return len(dirty)
+
+    def _evaluate(self, rule: Rule, vin: str, values: Dict[str, Any], now: float) -> None:
+        key = (rule.name, vin)
+        state = self._states.get(key)
+        if state == FIRING:
+            if rule.cleared(values):
+                del self._states[key]
+                self._emit(rule, vin, RESOLVED, now)
+        elif rule.matches(values):
+            if rule.for_seconds <= 0:
+                self._states[key] = FIRING
+                self._emit(rule, vin, FIRING, now)
+            elif state is None:
+                self._states[key] = "pending"
+                self.timers.schedule(key, now + rule.for_seconds)
+        elif state == "pending":
+            del self._states[key]
+            self.timers.cancel(key)
+
+    def _fire_due(self, now: float) -> None:
+        for key in self.timers.advance(now):
+            if self._states.get(key) != "pending":
+                continue
+            rule = self._rules_by_name[key[0]]
+            self._states[key] = FIRING
+            self._emit(rule, key[1], FIRING, now)
+
+    def advance(self, now: Optional[float] = None) -> None:
+        """Fire duration-based alerts whose time has come."""
+        self._fire_due(self.clock() if now is None else now)
+
+    def forget(self, vin: str) -> None:
+        """Drop all state for a vehicle."""
+        self._values.pop(vin, None)
+        for key in [k for k in self._states if k[1] == vin]:
+            del self._states[key]
+            self.timers.cancel(key)
+
+    def active(self) -> List[Tuple[str, str]]:
+        """Return (rule, vin) pairs that are currently firing."""
+        return [key for key, state in self._states.items() if state == FIRING]
+
+    async def run(self) -> None:
+        """Advance the timer wheel once per tick until cancelled."""
+        while True:
+            await asyncio.sleep(self.timers.tick)
+            self.advance()
@@ -1,136 +1,413 @@
 import asyncio
 import logging
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple, NamedTuple
 import httpx
 from .config import config
+from .tokens import TokenManager
+from .ratelimit import RateLimiter
+from .cache import TTLCache
+from .decoding import ACCEPT_ENCODING, DEFAULT_OFFLOAD_THRESHOLD, decode_json
+from .quota import QuotaLedger
+from .tracing import tracer
+from .concurrency import AdaptiveLimiter
+
+
+class RawResponse(NamedTuple):
+    """A response whose body may still be content-encoded."""
+
+    status_code: int
+    headers: httpx.Headers
+    body: bytes
+    encoding: str
+
+
+class VehicleListingError(Exception):
+    """Raised when a vehicle listing page after the first cannot be fetched."""
 
 
 class VolvoAPIClient:
     """Client for interacting with Volvo Cars API."""
-    
-    def __init__(self):
-        self.base_url = config.VOLVO_API_BASE_URL
-        self.client_id = config.VOLVO_CLIENT_ID
-        self.client_secret = config.VOLVO_CLIENT_SECRET
-        self.access_token: Optional[str] = None
-        self.refresh_token: Optional[str] = None
-        
+
+    def __init__(
+        self,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        token_manager: Optional[TokenManager] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[TTLCache] = None,
+        accept_encoding: str = ACCEPT_ENCODING,
+        decode_offload_threshold: Optional[int] = DEFAULT_OFFLOAD_THRESHOLD,
+        quota: Optional[QuotaLedger] = None,
+        tenant: str = "",
+        read_limiter: Optional[AdaptiveLimiter] = None,
+        command_limiter: Optional[AdaptiveLimiter] = None,
+    ):
+        self.base_url = base_url or config.VOLVO_API_BASE_URL
+        self.client_id = client_id or config.VOLVO_CLIENT_ID
+        self.client_secret = client_secret or config.VOLVO_CLIENT_SECRET
+        self.api_key = api_key or config.VOLVO_API_KEY
+        self.tokens = token_manager or TokenManager()
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.accept_encoding = accept_encoding
+        self.decode_offload_threshold = decode_offload_threshold
+        self.quota = quota
+        self.tenant = tenant
+        self.read_limiter = read_limiter
+        self.command_limiter = command_limiter
+
+        # Shared transport; when None every request opens its own client
+        self._http_client = http_client
+
         # Setup logging
         self.logger = logging.getLogger(__name__)
-        
+
+    @property
+    def access_token(self) -> Optional[str]:
+        return self.tokens.access_token
+
+    @access_token.setter
+    def access_token(self, value: Optional[str]) -> None:
+        self.tokens.access_token = value
+
+    @property
+    def refresh_token(self) -> Optional[str]:
+        return self.tokens.refresh_token
+
+    @refresh_token.setter
+    def refresh_token(self, value: Optional[str]) -> None:
+        self.tokens.refresh_token = value
+
     async def authenticate(self) -> bool:
         """Authenticate with Volvo API using OAuth2."""
         try:
             # Implementation for OAuth2 authentication
             # This would involve the OAuth2 flow with Volvo's API
             self.logger.info("Authenticating with Volvo API...")
-            
+
             # Placeholder for actual authentication logic
             # In real implementation, this would handle:
             # 1. Authorization code flow
             # 2. Token exchange
             # 3. Token storage and refresh
-            
+
             return True
-            
+
         except Exception as e:
             self.logger.error(f"Authentication failed: {e}")
             return False
-    
+
+    async def _ensure_token(self) -> None:
+        """Authenticate if the token is missing or about to expire.
+
+        Concurrent callers of one account wait for a single authentication.
+        """
+        if not self.tokens.is_expired():
+            return
+        with tracer.span("volvo.token_wait"):
+            async with self.tokens.lock:
+                if self.tokens.is_expired():
+                    await self.authenticate()
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json",
+            "Accept-Encoding": self.accept_encoding,
+        }
+        if self.api_key:
+            headers["vcc-api-key"] = self.api_key
+        return headers
+
+    async def _send(
+        self, client: httpx.AsyncClient, method: str, url: str, headers: Dict[str, str]
+    ) -> RawResponse:
+        request = client.build_request(method, url, headers=headers)
+        if tracer.enabled:
+            self._trace_connection_wait(request)
+        with tracer.span("volvo.network") as span:
+            response = await client.send(request, stream=True)
+            span.set_attribute("http.status_code", response.status_code)
+            body, encoding = await self._read_body(response)
+            span.set_attribute("http.response_bytes", len(body))
+        return RawResponse(response.status_code, response.headers, body, encoding)
+
+    @staticmethod
+    def _trace_connection_wait(request: httpx.Request) -> None:
+        """Time the wait for a connection pool slot via httpcore trace events."""
+        started = time.time_ns()
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            nonlocal started
+            if started:
+                tracer.record("volvo.connection_wait", started, time.time_ns())
+                started = 0
+
+        request.extensions["trace"] = trace
+
+    @staticmethod
+    async def _read_body(response: httpx.Response) -> Tuple[bytes, str]:
+        """Return the raw body and its content encoding."""
+        try:
+            if response.is_stream_consumed:
+                # In-memory transports hand back responses that are already decoded
+                return response.content, "identity"
+            body = b"".join([chunk async for chunk in response.aiter_raw()])
+            return body, response.headers.get("content-encoding", "identity")
+        finally:
+            await response.aclose()
+
+    async def _request(
+        self, method: str, path: str, headers: Optional[Dict[str, str]] = None
+    ) -> RawResponse:
+        """Send a request through the shared transport, honouring the rate limit.
+
+        The body is returned still content-encoded, so large compressed
+        payloads can be decompressed off the event loop. Raises
+        QuotaExceededError when the daily API quota does not allow the call.
+        """
+        with tracer.span("volvo.request", method=method, path=path):
+            return await self._traced_request(method, path, headers)
+
+    async def _traced_request(
+        self, method: str, path: str, headers: Optional[Dict[str, str]]
+    ) -> RawResponse:
+        if self.rate_limiter is not None:
+            with tracer.span("volvo.rate_limit_wait"):
+                await self.rate_limiter.acquire()
+        if self.quota is not None:
+            # Checked and counted without an await in between, so concurrent
+            # callers cannot overshoot the quota
+            self.quota.check(command=method != "GET")
+            self.quota.record(method, path, self.tenant)
+        url = f"{self.base_url}{path}"
+        request_headers = self._headers()
+        if headers:
+            request_headers.update(headers)
+        limiter = self.read_limiter if method == "GET" else self.command_limiter
+        if limiter is None:
+            return await self._dispatch(method, url, request_headers)
+        async with limiter.slot() as slot:
+            response = await self._dispatch(method, url, request_headers)
+            # Throttling and server errors mean the upstream is overloaded
+            slot.dropped = response.status_code == 429 or response.status_code >= 500
+            return response
+
+    async def _dispatch(self, method: str, url: str, headers: Dict[str, str]) -> RawResponse:
+        if self._http_client is not None:
+            return await self._send(self._http_client, method, url, headers)
+        async with httpx.AsyncClient() as client:
+            return await self._send(client, method, url, headers)
+
+    def concurrency_metrics(self) -> Dict[str, Dict[str, int]]:
+        """Return the current adaptive concurrency limits, by request kind."""
+        limiters = {"reads": self.read_limiter, "commands": self.command_limiter}
+        return {kind: l.metrics() for kind, l in limiters.items() if l is not None}
+
+    async def _get_json(self, path: str) -> Tuple[int, Any]:
+        """GET `path` and return (status code, decoded body).
+
+        Decoded bodies are served from and stored in this account's cache
+        partition; callers must not mutate them.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(path)
+            if cached is not None:
+                return 200, cached
+        with tracer.span("volvo.get", path=path):
+            response = await self._request("GET", path)
+            if response.status_code != 200:
+                return response.status_code, None
+            with tracer.span("volvo.decode", bytes=len(response.body)):
+                data = await decode_json(
+                    response.body, response.encoding, self.decode_offload_threshold
+                )
+        if self.cache is not None:
+            self.cache.set(path, data)
+        return 200, data
+
     async def get_vehicles(self) -> Optional[Dict[str, Any]]:
         """Get list of vehicles associated with the account."""
-        if not self.access_token:
-            await self.authenticate()
-        
+        await self._ensure_token()
+        return await self._fetch_page("/connected-vehicle/v2/vehicles")
+
+    async def _fetch_page(self, path: str, strict: bool = False) -> Optional[Dict[str, Any]]:
+        """Fetch one page of the vehicle listing.
+
+        Failures return None, or raise `VehicleListingError` when `strict`.
+        """
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Authorization": f"Bearer {self.access_token}",
-                    "Content-Type": "application/json"
-                }
-                
-                response = await client.get(
-                    f"{self.base_url}/connected-vehicle/v2/vehicles",
-                    headers=headers
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    self.logger.error(f"Failed to get vehicles: {response.status_code}")
-                    return None
-                    
+            status_code, data = await self._get_json(path)
         except Exception as e:
             self.logger.error(f"Error getting vehicles: {e}")
+            if strict:
+                raise VehicleListingError(f"Error getting vehicles: {e}") from e
+            return None
+
+        if status_code == 200:
+            return data
+        self.logger.error(f"Failed to get vehicles: {status_code}")
+        if strict:
+            raise VehicleListingError(f"Failed to get vehicles: {status_code}")
+        return None
+
+    def _next_page(self, page: Dict[str, Any]) -> Optional[str]:
+        """Return the path of the next listing page, if the response links one."""
+        links = page.get("links") or {}
+        href = links.get("next") if isinstance(links, dict) else None
+        if not href:
             return None
-    
+        if href.startswith(self.base_url):
+            href = href[len(self.base_url):]
+        return href
+
+    async def iter_vehicles(self) -> AsyncIterator[str]:
+        """Yield the VINs of the account, following pagination.
+
+        The next page is requested while the caller is still processing the
+        current one. If a page after the first fails, `VehicleListingError`
+        is raised so a partial fleet is not mistaken for the whole one.
+        """
+        await self._ensure_token()
+
+        task: Optional[asyncio.Future] = asyncio.ensure_future(
+            self._fetch_page("/connected-vehicle/v2/vehicles")
+        )
+        try:
+            while task is not None:
+                page = await task
+                task = None
+                if not page:
+                    return
+                next_path = self._next_page(page)
+                if next_path:
+                    task = asyncio.ensure_future(self._fetch_page(next_path, strict=True))
+                for vehicle in page.get("data", []):
+                    vin = vehicle.get("vin")
+                    if vin:
+                        yield vin
+        finally:
+            if task is not None:
+                task.cancel()
+
+    async def iter_vehicle_statuses(
+        self, concurrency: int = 8
+    ) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """Yield (vin, status) pairs as they complete.
+
+        Status requests start as soon as the first VINs arrive, with at most
+        `concurrency` in flight, so memory stays bounded for any fleet size.
+        A listing failure is raised once the statuses already started are out.
+        """
+        vins: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        errors: List[Exception] = []
+
+        async def produce():
+            try:
+                async for vin in self.iter_vehicles():
+                    await vins.put(vin)
+            except Exception as e:
+                self.logger.error(f"Error listing vehicles: {e}")
+                errors.append(e)
+            for _ in range(concurrency):
+                await vins.put(None)
+
+        async def work():
+            while True:
+                vin = await vins.get()
+                if vin is None:
+                    break
+                await results.put((vin, await self.get_vehicle_status(vin)))
+            await results.put(None)
+
+        tasks = [asyncio.ensure_future(produce())]
+        tasks += [asyncio.ensure_future(work()) for _ in range(concurrency)]
+        try:
+            remaining = concurrency
+            while remaining:
+                item = await results.get()
+                if item is None:
+                    remaining -= 1
+                else:
+                    yield item
+            if errors:
+                raise errors[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     async def get_vehicle_status(self, vin: str) -> Optional[Dict[str, Any]]:
         """Get current status of a specific vehicle."""
-        if not self.access_token:
-            await self.authenticate()
-        
+        await self._ensure_token()
+
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Authorization": f"Bearer {self.access_token}",
-                    "Content-Type": "application/json"
-                }
-                
-                response = await client.get(
-                    f"{self.base_url}/connected-vehicle/v2/vehicles/{vin}/status",
-                    headers=headers
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    self.logger.error(f"Failed to get vehicle status: {response.status_code}")
-                    return None
-                    
+            status_code, data = await self._get_json(
+                f"/connected-vehicle/v2/vehicles/{vin}/status"
+            )
+
+            if status_code == 200:
+                return data
+            else:
+                self.logger.error(f"Failed to get vehicle status: {status_code}")
+                return None
+
         except Exception as e:
             self.logger.error(f"Error getting vehicle status: {e}")
             return None
-    
+
     async def lock_vehicle(self, vin: str) -> bool:
         """Lock the specified vehicle."""
         return await self._send_command(vin, "lock")
-    
+
     async def unlock_vehicle(self, vin: str) -> bool:
         """Unlock the specified vehicle."""
         return await self._send_command(vin, "unlock")
-    
+
     async def start_engine(self, vin: str) -> bool:
         """Start the engine of the specified vehicle."""
         return await self._send_command(vin, "engine/start")
-    
+
     async def stop_engine(self, vin: str) -> bool:
         """Stop the engine of the specified vehicle."""
         return await self._send_command(vin, "engine/stop")
-    
-    async def _send_command(self, vin: str, command: str) -> bool:
+
+    async def _send_command(
+        self, vin: str, command: str, idempotency_key: Optional[str] = None
+    ) -> bool:
         """Send a command to the vehicle."""
-        if not self.access_token:
-            await self.authenticate()
-        
+        return await self._post_command(vin, command, idempotency_key) in (200, 202)
+
+    async def _post_command(
+        self, vin: str, command: str, idempotency_key: Optional[str] = None
+    ) -> Optional[int]:
+        """Send a command and return the response status, or None if it was not sent.
+
+        `idempotency_key` is sent as the Idempotency-Key header so a command
+        redelivered after a crash or timeout is not executed twice.
+        """
+        await self._ensure_token()
+
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Authorization": f"Bearer {self.access_token}",
-                    "Content-Type": "application/json"
-                }
-                
-                response = await client.post(
-                    f"{self.base_url}/connected-vehicle/v2/vehicles/{vin}/commands/{command}",
-                    headers=headers
-                )
-                
-                if response.status_code in [200, 202]:
-                    self.logger.info(f"Command {command} sent successfully to vehicle {vin}")
-                    return True
-                else:
-                    self.logger.error(f"Failed to send command {command}: {response.status_code}")
-                    return False
-                    
+            response = await self._request(
+                "POST",
+                f"/connected-vehicle/v2/vehicles/{vin}/commands/{command}",
+                headers={"Idempotency-Key": idempotency_key} if idempotency_key else None,
+            )
+
+            if response.status_code in [200, 202]:
+                self.logger.info(f"Command {command} sent successfully to vehicle {vin}")
+                if self.cache is not None:
+                    self.cache.invalidate(f"/connected-vehicle/v2/vehicles/{vin}/")
+            else:
+                self.logger.error(f"Failed to send command {command}: {response.status_code}")
+            return response.status_code
+
         except Exception as e:
             self.logger.error(f"Error sending command {command}: {e}")
-            return False
+            return None
@@ -0,0 +1,39 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Any, Tuple
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire after a fixed time-to-live."""
+
+    def __init__(self, ttl: float, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key`, or None if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if time.monotonic() >= expires:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store `value` under `key`, evicting the least recently used entry."""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, prefix: str = "") -> None:
+        """Drop all entries whose key starts with `prefix`."""
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,183 @@
+"""
+HTTP record/replay at the httpx transport level.
+
+`RecordingTransport` wraps a real or mock transport and captures every
+exchange with tokens and VINs scrubbed. `ReplayTransport` serves the
+captured exchanges back, optionally reproducing (or scaling) the recorded
+latency, so the full client stack can be exercised offline.
+
+Cassettes are gzip-compressed NDJSON: a header line followed by one compact
+line per exchange.
+"""
+
+import asyncio
+import gzip
+import json
+import re
+import time
+from collections import deque
+from typing import Optional, Dict, Any, List, Deque
+import httpx
+
+
+CASSETTE_VERSION = 1
+
+_VIN_RE = re.compile(r"\b[A-HJ-NPR-Z0-9]{17}\b")
+_PLACEHOLDER_PREFIX = "XXXXXXXX"
+_SECRET_FIELDS = ("access_token", "refresh_token", "id_token", "code", "client_secret")
+_SECRET_JSON_RE = re.compile(r'("(?:%s)"\s*:\s*)"[^"]*"' % "|".join(_SECRET_FIELDS))
+_KEPT_HEADERS = ("content-type",)
+
+
+class CassetteError(Exception):
+    """Raised when a replayed request has no recorded exchange."""
+
+
+class Scrubber:
+    """Replace VINs with stable placeholders and blank out secrets.
+
+    Placeholders are numbered in the order VINs are first seen; `vins` can
+    pin known VINs to placeholders up front.
+    """
+
+    def __init__(self, vins: Optional[Dict[str, str]] = None):
+        self._vins: Dict[str, str] = dict(vins or {})
+
+    def _vin(self, match: "re.Match") -> str:
+        vin = match.group(0)
+        if vin.startswith(_PLACEHOLDER_PREFIX):
+            return vin
+        if vin not in self._vins:
+            self._vins[vin] = f"{_PLACEHOLDER_PREFIX}{len(self._vins) + 1:09d}"
+        return self._vins[vin]
+
+    def scrub(self, text: str) -> str:
+        text = _SECRET_JSON_RE.sub(r'\1"<scrubbed>"', text)
+        return _VIN_RE.sub(self._vin, text)
+
+
+def _request_key(method: str, url: httpx.URL) -> str:
+    target = url.raw_path.decode("ascii")
+    return f"{method} {target}"
+
+
+class Cassette:
+    """An ordered list of recorded HTTP exchanges."""
+
+    def __init__(self, interactions: Optional[List[Dict[str, Any]]] = None):
+        self.interactions: List[Dict[str, Any]] = interactions or []
+
+    def append(
+        self, key: str, status: int, headers: Dict[str, str], body: str, elapsed: float
+    ) -> None:
+        self.interactions.append(
+            {"k": key, "s": status, "h": headers, "b": body, "t": round(elapsed, 6)}
+        )
+
+    def save(self, path: str) -> None:
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"version": CASSETTE_VERSION}) + "\n")
+            for interaction in self.interactions:
+                f.write(json.dumps(interaction, separators=(",", ":")) + "\n")
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise CassetteError(f"Unsupported cassette version: {header.get('version')}")
+            return cls([json.loads(line) for line in f if line.strip()])
+
+    def __len__(self) -> int:
+        return len(self.interactions)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Forward requests to `inner` and record scrubbed exchanges."""
+
+    def __init__(
+        self,
+        inner: httpx.AsyncBaseTransport,
+        cassette: Optional[Cassette] = None,
+        scrubber: Optional[Scrubber] = None,
+    ):
+        self.inner = inner
+        self.cassette = cassette if cassette is not None else Cassette()
+        self.scrubber = scrubber or Scrubber()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        elapsed = time.perf_counter() - started
+
+        # Bodies are stored decoded, so encoding/length headers are dropped
+        headers = {k: v for k, v in response.headers.items() if k.lower() in _KEPT_HEADERS}
+        text = body.decode("utf-8", errors="replace")
+        self.cassette.append(
+            self.scrubber.scrub(_request_key(request.method, request.url)),
+            response.status_code,
+            headers,
+            self.scrubber.scrub(text),
+            elapsed,
+        )
+        return httpx.Response(
+            response.status_code, headers=headers, content=body, request=request
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serve exchanges from a cassette.
+
+    Requests are matched on method and path; repeated requests consume the
+    recorded exchanges in order. With `loop=True` they wrap around, which is
+    what load tests want. `latency_scale` multiplies the recorded latency:
+    0 replays instantly, 1 reproduces the recording.
+
+    Request keys are scrubbed like the recording, so callers may use real
+    VINs: they map to placeholders in first-seen order, which matches the
+    recording when VINs are requested in the same order. Pass the recording
+    `Scrubber` (or one with pinned `vins`) to make the mapping explicit.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency_scale: float = 0.0,
+        loop: bool = False,
+        scrubber: Optional[Scrubber] = None,
+    ):
+        self.latency_scale = latency_scale
+        self.loop = loop
+        self.scrubber = scrubber or Scrubber()
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {}
+        for interaction in cassette.interactions:
+            self._queues.setdefault(interaction["k"], deque()).append(interaction)
+
+    def _next(self, key: str) -> Dict[str, Any]:
+        queue = self._queues.get(key)
+        if not queue:
+            raise CassetteError(f"No recorded exchange for {key}")
+        interaction = queue.popleft()
+        if self.loop:
+            queue.append(interaction)
+        return interaction
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        interaction = self._next(
+            self.scrubber.scrub(_request_key(request.method, request.url))
+        )
+        if self.latency_scale > 0:
+            await asyncio.sleep(interaction["t"] * self.latency_scale)
+        return httpx.Response(
+            interaction["s"],
+            headers=interaction["h"],
+            content=interaction["b"].encode("utf-8"),
+            request=request,
+        )
@@ -0,0 +1,296 @@
+"""
+Durable write-ahead log for vehicle commands.
+
+Commands are appended to a local NDJSON log and fsynced (in batches, on a
+worker thread) before `submit` returns, then delivered in order per VIN.
+Undelivered commands survive restarts and are retried until they expire;
+every command carries an idempotency key so redelivery is safe. The log is
+compacted on start and whenever enough completed commands have piled up.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import deque, OrderedDict
+from typing import Optional, Dict, Any, List, Deque, Tuple
+from .api_client import VolvoAPIClient
+
+
+SENT = "sent"
+EXPIRED = "expired"
+FAILED = "failed"
+
+# Rejections that will not succeed on retry. 401/403 are not among them: a
+# command sent with an expired token is retried until the token is renewed.
+_PERMANENT_STATUSES = frozenset({400, 404, 409, 410, 422})
+
+logger = logging.getLogger(__name__)
+
+
+class CommandLog:
+    """Append-only NDJSON log with group commit.
+
+    Concurrent appends are gathered into one write and one fsync; each
+    `append` resolves once its record is on disk. Once `compact_after`
+    commands have completed, the log is rewritten with only the live ones.
+    """
+
+    def __init__(self, path: str, max_batch: int = 1000, compact_after: int = 10000):
+        self.path = path
+        self.max_batch = max_batch
+        self.compact_after = compact_after
+        self._file = None
+        self._live: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._completed = 0
+        self._pending: List[Tuple[str, Optional[Dict[str, Any]], asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    def load(self) -> "OrderedDict[str, Dict[str, Any]]":
+        """Return the commands not yet completed, in submission order."""
+        entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        if not os.path.exists(self.path):
+            return entries
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    logger.warning(f"Skipping corrupt command log line in {self.path}")
+                    continue
+                if record.get("op") == "add":
+                    entries[record["id"]] = record
+                elif record.get("op") == "done":
+                    entries.pop(record["id"], None)
+        return entries
+
+    def _compact(self, entries: "OrderedDict[str, Dict[str, Any]]") -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in entries.values():
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _rewrite(self, entries: List[Dict[str, Any]]) -> None:
+        """Compact the open log down to `entries` and reopen it."""
+        # The live file stays open and intact if compaction fails
+        self._compact(OrderedDict((entry["id"], entry) for entry in entries))
+        self._file.close()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    async def open(self) -> "OrderedDict[str, Dict[str, Any]]":
+        """Load and compact the log, then start the writer."""
+        entries = await asyncio.to_thread(self.load)
+        await asyncio.to_thread(self._compact, entries)
+        self._live = OrderedDict(entries)
+        self._completed = 0
+        self._file = await asyncio.to_thread(open, self.path, "a", encoding="utf-8")
+        self._wakeup = asyncio.Event()
+        self._writer = asyncio.create_task(self._write_loop())
+        return entries
+
+    def _write_batch(self, lines: List[str]) -> None:
+        self._file.write("".join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        if record.get("op") == "add":
+            self._live[record["id"]] = record
+        elif record.get("op") == "done":
+            self._live.pop(record["id"], None)
+            self._completed += 1
+
+    async def _write_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                try:
+                    await asyncio.to_thread(self._write_batch, [line for line, _, _ in batch])
+                except Exception as e:
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for _, record, future in batch:
+                    if record is not None:
+                        self._apply(record)
+                    if not future.done():
+                        future.set_result(None)
+                if self._completed >= self.compact_after:
+                    # Between batches nothing else touches the file
+                    try:
+                        await asyncio.to_thread(self._rewrite, list(self._live.values()))
+                        self._completed = 0
+                    except OSError as e:
+                        logger.error(f"Error compacting command log {self.path}: {e}")
+
+    async def _enqueue_line(self, line: str, record: Optional[Dict[str, Any]] = None) -> None:
+        if self._writer is None:
+            raise RuntimeError("CommandLog is not open")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((line, record, future))
+        self._wakeup.set()
+        await future
+
+    async def append(self, record: Dict[str, Any]) -> None:
+        """Append `record` and wait until it has been fsynced."""
+        await self._enqueue_line(json.dumps(record, separators=(",", ":")) + "\n", record)
+
+    async def close(self) -> None:
+        """Flush outstanding records and close the file."""
+        if self._writer is None:
+            return
+        # Batches are written in order, so an empty barrier flushes everything
+        await self._enqueue_line("")
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+        await asyncio.to_thread(self._file.close)
+
+
+class CommandQueue:
+    """Deliver logged commands in order per VIN, surviving API outages.
+
+    Failed sends are retried with exponential backoff until the command's
+    time-to-live runs out, so a stale "unlock" is never delivered late.
+    Commands the API rejects outright (e.g. 400 or 404) fail at once.
+    """
+
+    def __init__(
+        self,
+        client: VolvoAPIClient,
+        path: str,
+        default_ttl: float = 300.0,
+        retry_interval: float = 1.0,
+        max_retry_interval: float = 60.0,
+        compact_after: int = 10000,
+    ):
+        self.client = client
+        self.log = CommandLog(path, compact_after=compact_after)
+        self.default_ttl = default_ttl
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._results: Dict[str, asyncio.Future] = {}
+        self._outcomes: "OrderedDict[str, str]" = OrderedDict()
+        self.max_outcomes = 10000
+
+    async def start(self) -> int:
+        """Open the log and resume delivery; return the number of pending commands."""
+        entries = await self.log.open()
+        for entry in entries.values():
+            self._enqueue(entry)
+        if entries:
+            logger.info(f"Resuming {len(entries)} pending commands")
+        return len(entries)
+
+    async def submit(
+        self,
+        vin: str,
+        command: str,
+        ttl: Optional[float] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> str:
+        """Durably log a command for delivery and return its id."""
+        command_id = uuid.uuid4().hex
+        now = time.time()
+        entry = {
+            "op": "add",
+            "id": command_id,
+            "vin": vin,
+            "command": command,
+            "created": now,
+            "expires": now + (ttl if ttl is not None else self.default_ttl),
+            "key": idempotency_key or command_id,
+        }
+        await self.log.append(entry)
+        self._enqueue(entry)
+        return command_id
+
+    async def wait(self, command_id: str) -> str:
+        """Wait for a command to be sent, fail or expire and return the outcome."""
+        if command_id in self._outcomes:
+            return self._outcomes[command_id]
+        future = self._results.get(command_id)
+        if future is None:
+            raise KeyError(f"Unknown command: {command_id}")
+        return await asyncio.shield(future)
+
+    def pending(self, vin: Optional[str] = None) -> int:
+        """Return the number of undelivered commands, optionally for one VIN."""
+        if vin is not None:
+            return len(self._queues.get(vin, ()))
+        return sum(len(q) for q in self._queues.values())
+
+    def _enqueue(self, entry: Dict[str, Any]) -> None:
+        vin = entry["vin"]
+        self._queues.setdefault(vin, deque()).append(entry)
+        self._results[entry["id"]] = asyncio.get_running_loop().create_future()
+        if vin not in self._workers:
+            self._workers[vin] = asyncio.create_task(self._deliver(vin))
+
+    async def _complete(self, entry: Dict[str, Any], outcome: str) -> None:
+        await self.log.append({"op": "done", "id": entry["id"], "result": outcome})
+        future = self._results.pop(entry["id"], None)
+        if future is not None and not future.done():
+            future.set_result(outcome)
+        self._outcomes[entry["id"]] = outcome
+        while len(self._outcomes) > self.max_outcomes:
+            self._outcomes.popitem(last=False)
+
+    async def _deliver(self, vin: str) -> None:
+        queue = self._queues[vin]
+        try:
+            while queue:
+                entry = queue[0]
+                delay = self.retry_interval
+                while True:
+                    if time.time() >= entry["expires"]:
+                        logger.warning(
+                            f"Command {entry['command']} for vehicle {vin} expired undelivered"
+                        )
+                        outcome = EXPIRED
+                        break
+                    status = await self.client._post_command(
+                        vin, entry["command"], entry["key"]
+                    )
+                    if status in (200, 202):
+                        outcome = SENT
+                        break
+                    if status in _PERMANENT_STATUSES:
+                        logger.warning(
+                            f"Command {entry['command']} for vehicle {vin} rejected: {status}"
+                        )
+                        outcome = FAILED
+                        break
+                    await asyncio.sleep(min(delay, max(0.0, entry["expires"] - time.time())))
+                    delay = min(delay * 2, self.max_retry_interval)
+                await self._complete(entry, outcome)
+                queue.popleft()
+        finally:
+            if not queue:
+                self._queues.pop(vin, None)
+            self._workers.pop(vin, None)
+
+    async def close(self) -> None:
+        """Stop delivery and close the log; undelivered commands stay logged."""
+        workers = list(self._workers.values())
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._queues.clear()
+        await self.log.close()
@@ -0,0 +1,201 @@
+"""
+Adaptive concurrency limits for upstream calls.
+
+An `AdaptiveLimiter` caps the number of requests in flight and moves the cap
+after every response, using one of two control laws:
+
+* `AIMDLimit` adds one slot per successful response while the limit is in
+  use and multiplies it by `backoff` on errors, throttling or timeouts.
+* `GradientLimit` compares the recent round-trip time with the no-load
+  RTT. While they agree the limit grows by a small queue allowance; once
+  requests start queueing upstream (the recent RTT rises) the limit
+  shrinks in proportion.
+
+The client keeps separate limiters for reads and commands so a burst of
+status polling cannot starve vehicle commands.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Deque, AsyncIterator
+from .tracing import tracer
+
+
+class AIMDLimit:
+    """Additive increase, multiplicative decrease."""
+
+    def __init__(
+        self,
+        initial: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        backoff: float = 0.9,
+        timeout: float = 5.0,
+    ):
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        # Responses slower than this count as drops
+        self.timeout = timeout
+
+    def update(self, limit: float, rtt: float, inflight: int, dropped: bool) -> float:
+        if dropped or rtt > self.timeout:
+            return max(self.min_limit, limit * self.backoff)
+        # Only probe upwards when the current limit is actually being used
+        if inflight * 2 >= limit:
+            return min(self.max_limit, limit + 1)
+        return limit
+
+
+class GradientLimit:
+    """Latency gradient control, after Netflix's Gradient2 and TCP Vegas.
+
+    The no-load RTT is the minimum observed RTT. It is re-probed every
+    `probe_multiplier * limit` samples so a lasting change in upstream
+    latency is not mistaken for queueing for long.
+    """
+
+    def __init__(
+        self,
+        initial: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        smoothing: float = 0.2,
+        tolerance: float = 1.2,
+        probe_multiplier: int = 30,
+        backoff: float = 0.9,
+    ):
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.smoothing = smoothing
+        # Ratio of recent to no-load RTT accepted before the limit shrinks
+        self.tolerance = tolerance
+        self.probe_multiplier = probe_multiplier
+        self.backoff = backoff
+        self.noload_rtt = 0.0
+        self.short_rtt = 0.0
+        self._samples = 0
+        self._rtt_sum = 0.0
+        self._rtt_count = 0
+        self._window_end = 0.0
+
+    def update(self, limit: float, rtt: float, inflight: int, dropped: bool) -> float:
+        if dropped:
+            return max(self.min_limit, limit * self.backoff)
+        self._samples += 1
+        if self._samples >= self.probe_multiplier * limit:
+            self._samples = 0
+            self.noload_rtt = rtt
+        elif not self.noload_rtt or rtt < self.noload_rtt:
+            self.noload_rtt = rtt
+
+        # Decide once per round trip on the window's mean RTT; reacting to
+        # every sample would shrink the limit many times for one queue build-up
+        self._rtt_sum += rtt
+        self._rtt_count += 1
+        now = time.monotonic()
+        if now < self._window_end:
+            return limit
+        self.short_rtt = self._rtt_sum / self._rtt_count
+        self._rtt_sum, self._rtt_count = 0.0, 0
+        self._window_end = now + self.short_rtt
+        if inflight * 2 < limit:
+            return limit
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.noload_rtt / self.short_rtt))
+        target = limit * gradient + math.sqrt(limit)
+        target = limit * (1 - self.smoothing) + target * self.smoothing
+        return max(self.min_limit, min(self.max_limit, target))
+
+
+class _Slot:
+    __slots__ = ("dropped",)
+
+    def __init__(self):
+        self.dropped = False
+
+
+class AdaptiveLimiter:
+    """Limit in-flight requests to a limit discovered by `algorithm`."""
+
+    def __init__(self, algorithm=None, name: str = "default"):
+        self.algorithm = algorithm or GradientLimit()
+        self.name = name
+        self._limit = float(self.algorithm.initial)
+        self.inflight = 0
+        self.dropped = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(self._limit))
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "limit": self.limit,
+            "inflight": self.inflight,
+            "waiting": len(self._waiters),
+            "dropped": self.dropped,
+        }
+
+    def _wake(self) -> None:
+        while self._waiters and self.inflight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.inflight += 1
+                waiter.set_result(None)
+
+    async def _acquire(self) -> None:
+        if self.inflight < self.limit and not self._waiters:
+            self.inflight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            with tracer.span("volvo.concurrency_wait", limiter=self.name):
+                await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled
+                self.inflight -= 1
+                self._wake()
+            else:
+                # Still queued; drop it so `waiting` counts live waiters only
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def _release(self, rtt: Optional[float], dropped: bool) -> None:
+        if rtt is not None:
+            self._limit = self.algorithm.update(self._limit, rtt, self.inflight, dropped)
+        self.inflight -= 1
+        self.dropped += dropped
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[_Slot]:
+        """Hold one slot for the duration of a request.
+
+        Exceptions count as drops; callers set `dropped` on the yielded slot
+        for responses that signal overload (e.g. 429 or 503).
+        """
+        await self._acquire()
+        slot = _Slot()
+        started = time.perf_counter()
+        try:
+            yield slot
+        except asyncio.CancelledError:
+            # Says nothing about the upstream; do not adjust the limit
+            self._release(None, False)
+            raise
+        except Exception:
+            self._release(time.perf_counter() - started, True)
+            raise
+        self._release(time.perf_counter() - started, slot.dropped)
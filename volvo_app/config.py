@@ -13,6 +13,9 @@ class VolvoConfig(BaseSettings):
     VOLVO_VIN: Optional[str] = 'YV1ZWK8V4S2663123'      # Dodaj VIN Twojego pojazdu
     VOLVO_API_BASE_URL: str = "https://api.volvocars.com"
     VOLVO_REDIRECT_URI: str = "http://localhost:8000/callback"
+    VOLVO_AUTH_URL: str = "https://volvoid.eu.volvocars.com/as/authorization.oauth2"
+    VOLVO_TOKEN_URL: str = "https://volvoid.eu.volvocars.com/as/token.oauth2"
+    VOLVO_API_DAILY_QUOTA: int = 10000  # Dzienny limit wywołań dla VOLVO_API_KEY
     
     # Application settings
     APP_NAME: str = "Volvo Integration App"
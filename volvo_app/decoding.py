@@ -0,0 +1,132 @@
+import asyncio
+import json
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, List
+
+
+def _available_encodings() -> List[str]:
+    """Return the content encodings that can be decoded in this environment."""
+    encodings = ["gzip", "deflate"]
+    try:
+        import brotli  # noqa: F401
+        encodings.insert(0, "br")
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            encodings.insert(0, "br")
+        except ImportError:
+            pass
+    try:
+        import zstandard  # noqa: F401
+        encodings.insert(0, "zstd")
+    except ImportError:
+        pass
+    return encodings
+
+
+# Preferred first: zstd and brotli compress JSON better than gzip
+ACCEPT_ENCODING = ", ".join(_available_encodings())
+
+# Bodies expected to decode to at least this many bytes are handled on a worker thread
+DEFAULT_OFFLOAD_THRESHOLD = 256 * 1024
+
+# Compressed bodies whose decoded size cannot be read cheaply (brotli, zstd,
+# stacked codings) are assumed to expand this much; JSON often reaches 30x
+_WORST_CASE_RATIO = 50
+
+# The C JSON decoder holds the GIL for a whole document, so decoding several
+# large bodies in parallel threads would stall the loop just as badly. One
+# worker keeps at most one decode competing with the loop at any time.
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _decoder() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="volvo-json")
+    return _executor
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    """Undo a Content-Encoding header value (e.g. "gzip" or "gzip, br")."""
+    for coding in reversed([c.strip().lower() for c in encoding.split(",")]):
+        if coding in ("", "identity"):
+            continue
+        if coding == "gzip":
+            body = zlib.decompress(body, zlib.MAX_WBITS | 16)
+        elif coding == "deflate":
+            try:
+                body = zlib.decompress(body)
+            except zlib.error:
+                body = zlib.decompress(body, -zlib.MAX_WBITS)
+        elif coding == "br":
+            try:
+                import brotli
+            except ImportError:
+                import brotlicffi as brotli
+            body = brotli.decompress(body)
+        elif coding == "zstd":
+            import zstandard
+            body = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+        else:
+            raise ValueError(f"Unsupported content encoding: {coding}")
+    return body
+
+
+def _decode(body: bytes, encoding: str) -> Any:
+    return json.loads(decompress(body, encoding))
+
+
+def _probe(body: bytes, wbits: int, limit: int) -> Optional[bytes]:
+    """Inflate at most `limit` bytes; return the result only if that was all of it."""
+    decompressor = zlib.decompressobj(wbits)
+    data = decompressor.decompress(body, limit)
+    if decompressor.eof and not decompressor.unconsumed_tail and not decompressor.unused_data:
+        return data
+    return None
+
+
+def _small_body(body: bytes, encoding: str, limit: int) -> Optional[bytes]:
+    """Return the decoded body if it is known to be under `limit` bytes, else None.
+
+    gzip bodies are judged by their ISIZE trailer, and gzip and deflate are
+    then inflated with a bound of `limit`, so the loop never does more than
+    `limit` bytes of work for a body that ends up offloaded.
+    """
+    codings = [c.strip().lower() for c in encoding.split(",")]
+    codings = [c for c in codings if c not in ("", "identity")]
+    if not codings:
+        return body if len(body) < limit else None
+    if codings == ["gzip"]:
+        # ISIZE is the last member's size modulo 2**32; the probe catches the rest
+        if len(body) < 18 or int.from_bytes(body[-4:], "little") >= limit:
+            return None
+        try:
+            return _probe(body, zlib.MAX_WBITS | 16, limit)
+        except zlib.error:
+            return None
+    if codings == ["deflate"]:
+        for wbits in (zlib.MAX_WBITS, -zlib.MAX_WBITS):
+            try:
+                return _probe(body, wbits, limit)
+            except zlib.error:
+                continue
+        return None
+    return None if len(body) * _WORST_CASE_RATIO >= limit else decompress(body, encoding)
+
+
+async def decode_json(
+    body: bytes,
+    encoding: str = "identity",
+    offload_threshold: Optional[int] = DEFAULT_OFFLOAD_THRESHOLD,
+) -> Any:
+    """Decompress and decode a JSON body, off the event loop when it is large."""
+    if offload_threshold is None:
+        return _decode(body, encoding)
+    data = _small_body(body, encoding, offload_threshold)
+    if data is not None:
+        return json.loads(data)
+    return await asyncio.get_running_loop().run_in_executor(
+        _decoder(), _decode, body, encoding
+    )
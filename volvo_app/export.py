@@ -0,0 +1,271 @@
+"""
+Streaming export of fleet snapshots and stored history.
+
+Records flow through async generators and are written in fixed-size chunks
+on a worker thread, so memory stays bounded by the chunk size regardless of
+fleet size or time range.
+"""
+
+import abc
+import asyncio
+import csv
+import gzip
+import io
+import json
+import logging
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, AsyncIterator, AsyncIterable, IO, Iterator
+from .api_client import VolvoAPIClient
+from .tracing import tracer
+from .utils import flatten_dict
+
+
+FORMATS = ("ndjson", "csv", "parquet")
+
+logger = logging.getLogger(__name__)
+
+
+async def iter_fleet_snapshots(
+    client: VolvoAPIClient, concurrency: int = 8
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield one snapshot record per vehicle of the account, in completion order."""
+    async for vin, status in client.iter_vehicle_statuses(concurrency):
+        yield {
+            "vin": vin,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "status": status,
+        }
+
+
+async def iter_history(path: str, chunk_bytes: int = 1 << 20) -> AsyncIterator[Dict[str, Any]]:
+    """Yield records from an NDJSON history file (optionally gzip-compressed)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    handle = await asyncio.to_thread(opener, path, "rt", encoding="utf-8")
+    try:
+        while True:
+            lines = await asyncio.to_thread(handle.readlines, chunk_bytes)
+            if not lines:
+                break
+            for line in lines:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    finally:
+        await asyncio.to_thread(handle.close)
+
+
+class _Writer(abc.ABC):
+    """Base class for chunk writers; all methods run on a worker thread."""
+
+    binary = False
+
+    def __init__(self, path: Optional[str], compression: Optional[str]):
+        if compression not in (None, "gzip") and not self.binary:
+            raise ValueError(f"Unsupported compression for text formats: {compression}")
+        self.compression = compression
+        self._close_stream = path not in (None, "-")
+        if not self._close_stream:
+            raw: IO = sys.stdout.buffer
+        else:
+            raw = open(path, "wb")
+        self._raw = raw
+        if compression == "gzip" and not self.binary:
+            raw = gzip.GzipFile(fileobj=raw, mode="wb")
+        self._stream = raw
+        self._text = (
+            io.TextIOWrapper(raw, encoding="utf-8", newline="") if not self.binary else None
+        )
+
+    @abc.abstractmethod
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        """Write one chunk of records."""
+
+    def close(self) -> None:
+        if self._text is not None:
+            self._text.flush()
+            self._text.detach()
+        if self._stream is not self._raw:
+            self._stream.close()
+        if self._close_stream:
+            self._raw.close()
+        else:
+            self._raw.flush()
+
+
+class NDJSONWriter(_Writer):
+    """Write one JSON document per line."""
+
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        self._text.write(
+            "".join(json.dumps(r, default=str, separators=(",", ":")) + "\n" for r in records)
+        )
+
+
+class _SpooledWriter(_Writer):
+    """Writer for formats whose header or schema must cover every record.
+
+    Flattened chunks are spooled to a temporary file while the schema of the
+    whole export is collected, and written out on `close`. Memory stays
+    bounded by the chunk size; the output appears only once the export ends.
+    """
+
+    def __init__(self, path: Optional[str], compression: Optional[str]):
+        super().__init__(path, compression)
+        self._spool = tempfile.TemporaryFile("w+", encoding="utf-8")
+
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        line = json.dumps([flatten_dict(r) for r in records], default=str, separators=(",", ":"))
+        # Observe the rows as they will be read back (datetimes as strings etc.)
+        self._observe(json.loads(line))
+        self._spool.write(line + "\n")
+
+    def _chunks(self) -> Iterator[List[Dict[str, Any]]]:
+        self._spool.seek(0)
+        for line in self._spool:
+            yield json.loads(line)
+
+    @abc.abstractmethod
+    def _observe(self, rows: List[Dict[str, Any]]) -> None:
+        """Widen the schema to cover `rows`."""
+
+    @abc.abstractmethod
+    def _flush_spool(self) -> None:
+        """Write all spooled chunks to the output."""
+
+    def close(self) -> None:
+        try:
+            self._flush_spool()
+        finally:
+            self._spool.close()
+            super().close()
+
+
+class CSVWriter(_SpooledWriter):
+    """Write flattened records as CSV, with a column for every key seen."""
+
+    def __init__(self, path: Optional[str], compression: Optional[str]):
+        super().__init__(path, compression)
+        self._columns: Dict[str, None] = {}
+
+    def _observe(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            self._columns.update(dict.fromkeys(row))
+
+    def _flush_spool(self) -> None:
+        writer = csv.DictWriter(self._text, fieldnames=list(self._columns))
+        writer.writeheader()
+        for rows in self._chunks():
+            writer.writerows(rows)
+
+
+class ParquetWriter(_SpooledWriter):
+    """Write flattened records as Parquet row groups (requires `pyarrow`).
+
+    Each column takes the type inferred across every chunk: null columns take
+    the type seen elsewhere, ints widen to floats, and columns whose values
+    cannot share a type are written as strings.
+    """
+
+    binary = True
+
+    def __init__(self, path: Optional[str], compression: Optional[str]):
+        try:
+            import pyarrow  # noqa: F401
+            import pyarrow.parquet  # noqa: F401
+        except ImportError as e:
+            raise ImportError("Parquet export requires pyarrow: pip install pyarrow") from e
+        super().__init__(path, compression)
+        self._types: Dict[str, Any] = {}
+
+    @staticmethod
+    def _infer(values: List[Any]):
+        import pyarrow as pa
+
+        try:
+            return pa.array(values).type
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return pa.string()
+
+    @staticmethod
+    def _merge(old, new):
+        import pyarrow as pa
+
+        if old is None or pa.types.is_null(old):
+            return new
+        if pa.types.is_null(new) or old == new:
+            return old
+        try:
+            unified = pa.unify_schemas(
+                [pa.schema([("c", old)]), pa.schema([("c", new)])], promote_options="permissive"
+            )
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            # Conflicting types (pyarrow < 14 cannot promote any)
+            return pa.string()
+        return unified.field(0).type
+
+    def _observe(self, rows: List[Dict[str, Any]]) -> None:
+        columns: Dict[str, None] = {}
+        for row in rows:
+            columns.update(dict.fromkeys(row))
+        for name in columns:
+            inferred = self._infer([row.get(name) for row in rows])
+            self._types[name] = self._merge(self._types.get(name), inferred)
+
+    def _flush_spool(self) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not self._types:
+            return
+        schema = pa.schema(list(self._types.items()))
+        strings = [name for name, type_ in self._types.items() if pa.types.is_string(type_)]
+        with pq.ParquetWriter(
+            self._stream, schema, compression=self.compression or "snappy"
+        ) as writer:
+            for rows in self._chunks():
+                for row in rows:
+                    for name in strings:
+                        value = row.get(name)
+                        if value is not None and not isinstance(value, str):
+                            row[name] = json.dumps(value)
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+
+
+_WRITERS = {"ndjson": NDJSONWriter, "csv": CSVWriter, "parquet": ParquetWriter}
+
+
+async def export_records(
+    records: AsyncIterable[Dict[str, Any]],
+    path: Optional[str] = None,
+    fmt: str = "ndjson",
+    compression: Optional[str] = None,
+    chunk_size: int = 500,
+) -> int:
+    """Stream `records` to `path` (stdout when None or "-") and return the count.
+
+    `compression` is "gzip" for NDJSON/CSV, or any pyarrow codec for Parquet.
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    writer = await asyncio.to_thread(_WRITERS[fmt], path, compression)
+    count = 0
+    chunk: List[Dict[str, Any]] = []
+    try:
+        async for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                with tracer.span("export.write", records=len(chunk)):
+                    await asyncio.to_thread(writer.write, chunk)
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            await asyncio.to_thread(writer.write, chunk)
+            count += len(chunk)
+    finally:
+        await asyncio.to_thread(writer.close)
+
+    logger.info(f"Exported {count} records as {fmt}")
+    return count
@@ -0,0 +1,180 @@
+"""
+In-process mock of the Volvo Connected Vehicle API.
+
+`MockVolvoAPI` is an httpx transport, so it can be plugged into any
+`httpx.AsyncClient` (and therefore `VolvoAPIClient`) without opening sockets.
+"""
+
+import asyncio
+import gzip
+import re
+from typing import Optional, Dict, Callable, Union
+import httpx
+
+
+_STATUS_RE = re.compile(r"^/connected-vehicle/v2/vehicles/([^/]+)/status$")
+_COMMAND_RE = re.compile(r"^/connected-vehicle/v2/vehicles/([^/]+)/commands/(.+)$")
+
+Latency = Union[float, Callable[[httpx.Request], float]]
+
+
+class _BodyStream(httpx.AsyncByteStream):
+    """Body stream that httpx will not eagerly read (and decode) on creation."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    async def __aiter__(self):
+        yield self.body
+
+
+def mock_vin(index: int) -> str:
+    """Return a syntactically valid VIN for mock vehicle `index`."""
+    return f"YV1TEST{index:010d}"
+
+
+class MockVolvoAPI(httpx.AsyncBaseTransport):
+    """Serve vehicle listings, statuses and commands for a synthetic fleet."""
+
+    def __init__(
+        self,
+        vehicles: int = 10,
+        latency: Latency = 0.0,
+        page_size: Optional[int] = None,
+        status_padding: int = 0,
+        compress: bool = False,
+        capacity: Optional[int] = None,
+        max_queue: Optional[int] = None,
+    ):
+        self.vins = [mock_vin(i) for i in range(vehicles)]
+        self.page_size = page_size
+        # Extra entries per status document, to simulate large payloads
+        self.status_padding = status_padding
+        # Gzip responses when the client accepts it
+        self.compress = compress
+        # Encoded bodies are memoised so the mock adds little work of its own
+        self._gzipped: Dict[bytes, bytes] = {}
+        self._statuses: Dict[str, bytes] = {}
+        self._known = set(self.vins)
+        self.latency = latency
+        self.requests = 0
+        # Requests served at once; the rest queue, and beyond `max_queue`
+        # queued requests the mock answers 503 like an overloaded gateway
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self._workers: Optional[asyncio.Semaphore] = None
+        self.queued = 0
+        self.inflight = 0
+
+    def _delay(self, request: httpx.Request) -> float:
+        return self.latency(request) if callable(self.latency) else self.latency
+
+    def status_document(self, vin: str) -> dict:
+        """Return the status document served for `vin`."""
+        n = int(vin[-4:]) if vin[-4:].isdigit() else 0
+        document = {
+            "data": {
+                "vin": vin,
+                "fuelAmount": {"value": str(20 + n % 60), "unit": "%"},
+                "centralLock": {"value": "LOCKED"},
+                "engineStatus": {"value": "STOPPED"},
+            }
+        }
+        if self.status_padding:
+            document["data"]["diagnostics"] = [
+                {"code": f"D{i:06d}", "value": "NO_WARNING", "timestamp": "2024-01-01T00:00:00Z"}
+                for i in range(self.status_padding)
+            ]
+        return document
+
+    def _listing(self, request: httpx.Request) -> httpx.Response:
+        if not self.page_size:
+            return httpx.Response(200, json={"data": [{"vin": v} for v in self.vins]})
+        offset = int(request.url.params.get("offset", 0))
+        end = offset + self.page_size
+        body = {"data": [{"vin": v} for v in self.vins[offset:end]]}
+        if end < len(self.vins):
+            body["links"] = {"next": f"/connected-vehicle/v2/vehicles?offset={end}"}
+        return httpx.Response(200, json=body)
+
+    def _status_body(self, vin: str) -> bytes:
+        body = self._statuses.get(vin)
+        if body is None:
+            body = self._statuses[vin] = httpx.Response(
+                200, json=self.status_document(vin)
+            ).content
+        return body
+
+    def _gzip(self, body: bytes) -> bytes:
+        compressed = self._gzipped.get(body)
+        if compressed is None:
+            compressed = self._gzipped[body] = gzip.compress(body, 5)
+        return compressed
+
+    def prime(self) -> None:
+        """Pre-build every status body so benchmarks measure only the client."""
+        for vin in self.vins:
+            body = self._status_body(vin)
+            if self.compress:
+                self._gzip(body)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if request.method == "GET" and path == "/connected-vehicle/v2/vehicles":
+            return self._listing(request)
+
+        match = _STATUS_RE.match(path)
+        if request.method == "GET" and match:
+            if match.group(1) not in self._known:
+                return httpx.Response(404, json={"error": "vehicle not found"})
+            return httpx.Response(
+                200,
+                headers={"content-type": "application/json"},
+                content=self._status_body(match.group(1)),
+            )
+
+        match = _COMMAND_RE.match(path)
+        if request.method == "POST" and match:
+            if match.group(1) not in self._known:
+                return httpx.Response(404, json={"error": "vehicle not found"})
+            return httpx.Response(202, json={"data": {"invokeStatus": "COMPLETED"}})
+
+        return httpx.Response(404, json={"error": "not found"})
+
+    async def _serve(self, request: httpx.Request) -> Optional[httpx.Response]:
+        """Wait for a free worker and the request's latency; None if rejected."""
+        if self.capacity is None:
+            delay = self._delay(request)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return self._handle(request)
+
+        if self._workers is None:
+            self._workers = asyncio.Semaphore(self.capacity)
+        if self.max_queue is not None and self.queued >= self.max_queue:
+            return None
+        self.queued += 1
+        try:
+            await self._workers.acquire()
+        finally:
+            self.queued -= 1
+        self.inflight += 1
+        try:
+            await asyncio.sleep(self._delay(request))
+            return self._handle(request)
+        finally:
+            self.inflight -= 1
+            self._workers.release()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        response = await self._serve(request)
+        if response is None:
+            return httpx.Response(503, json={"error": "service unavailable"})
+        if self.compress and "gzip" in request.headers.get("accept-encoding", ""):
+            body = self._gzip(response.content)
+            headers = {"content-type": "application/json", "content-encoding": "gzip"}
+            return httpx.Response(
+                response.status_code, headers=headers, stream=_BodyStream(body)
+            )
+        return response
@@ -0,0 +1,207 @@
+"""
+Concurrent OAuth2 authorization-code onboarding for Volvo ID accounts.
+
+Each authorization gets its own `state` and PKCE verifier. The redirect
+callback resolves an asyncio future for that state, the code is exchanged
+for tokens straight into the `TokenStore`, and the waiting caller wakes up
+immediately; any number of users can be onboarding at the same time.
+"""
+
+import asyncio
+import base64
+import hashlib
+import html
+import logging
+import secrets
+from collections import OrderedDict
+from typing import Optional, Dict, List, Mapping, Tuple
+from urllib.parse import urlencode
+import httpx
+from .config import config
+from .tokens import TokenManager, TokenStore
+
+
+DEFAULT_SCOPES = ["openid", "conve:vehicle_relation"]
+
+logger = logging.getLogger(__name__)
+
+
+class OnboardingError(Exception):
+    """Raised when an authorization is denied, expires or cannot be exchanged."""
+
+
+def _pkce_pair() -> Tuple[str, str]:
+    verifier = secrets.token_urlsafe(64)
+    digest = hashlib.sha256(verifier.encode("ascii")).digest()
+    challenge = base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+    return verifier, challenge
+
+
+class _Pending:
+    __slots__ = ("account_id", "verifier", "future", "timer")
+
+    def __init__(self, account_id: str, verifier: str, future: asyncio.Future):
+        self.account_id = account_id
+        self.verifier = verifier
+        self.future = future
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class OnboardingService:
+    """Run many authorization-code flows at once and store the resulting tokens."""
+
+    def __init__(
+        self,
+        token_store: TokenStore,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        redirect_uri: Optional[str] = None,
+        scopes: Optional[List[str]] = None,
+        authorize_url: Optional[str] = None,
+        token_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        timeout: float = 300.0,
+    ):
+        self.token_store = token_store
+        self.client_id = client_id or config.VOLVO_CLIENT_ID
+        self.client_secret = client_secret or config.VOLVO_CLIENT_SECRET
+        self.redirect_uri = redirect_uri or config.VOLVO_REDIRECT_URI
+        self.scopes = scopes or DEFAULT_SCOPES
+        self.authorize_url = authorize_url or config.VOLVO_AUTH_URL
+        self.token_url = token_url or config.VOLVO_TOKEN_URL
+        self.timeout = timeout
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or httpx.AsyncClient()
+        self._pending: Dict[str, _Pending] = {}
+        # Finished flows nobody has waited for yet, so a fast callback is not lost
+        self._finished: "OrderedDict[str, asyncio.Future]" = OrderedDict()
+        self.max_finished = 10000
+
+    def start(self, account_id: str) -> Tuple[str, str]:
+        """Begin an authorization for `account_id`; return (authorization URL, state).
+
+        Must be called from the event loop. The authorization expires after
+        `timeout` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        state = secrets.token_urlsafe(24)
+        verifier, challenge = _pkce_pair()
+        pending = _Pending(account_id, verifier, loop.create_future())
+        # Nobody may be waiting; mark failures as retrieved to keep the loop quiet
+        pending.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        pending.timer = loop.call_later(self.timeout, self._expire, state)
+        self._pending[state] = pending
+
+        query = urlencode({
+            "response_type": "code",
+            "client_id": self.client_id,
+            "redirect_uri": self.redirect_uri,
+            "scope": " ".join(self.scopes),
+            "state": state,
+            "code_challenge": challenge,
+            "code_challenge_method": "S256",
+        })
+        return f"{self.authorize_url}?{query}", state
+
+    def _finish(self, state: str) -> Optional[_Pending]:
+        pending = self._pending.pop(state, None)
+        if pending is not None:
+            if pending.timer is not None:
+                pending.timer.cancel()
+            self._finished[state] = pending.future
+            while len(self._finished) > self.max_finished:
+                self._finished.popitem(last=False)
+        return pending
+
+    def _expire(self, state: str) -> None:
+        pending = self._finish(state)
+        if pending is not None and not pending.future.done():
+            pending.future.set_exception(OnboardingError("Authorization timed out"))
+
+    async def wait(self, state: str) -> TokenManager:
+        """Wait until the authorization for `state` completes."""
+        pending = self._pending.get(state)
+        if pending is not None:
+            return await asyncio.shield(pending.future)
+        future = self._finished.pop(state, None)
+        if future is None:
+            raise OnboardingError("Unknown authorization state")
+        return await future
+
+    async def _exchange(self, pending: _Pending, code: str) -> TokenManager:
+        response = await self.http_client.post(
+            self.token_url,
+            data={
+                "grant_type": "authorization_code",
+                "code": code,
+                "redirect_uri": self.redirect_uri,
+                "code_verifier": pending.verifier,
+            },
+            auth=(self.client_id, self.client_secret),
+        )
+        if response.status_code != 200:
+            raise OnboardingError(f"Token exchange failed: {response.status_code}")
+        return self.token_store.save(pending.account_id, response.json())
+
+    async def complete(
+        self, state: str, code: Optional[str] = None, error: Optional[str] = None
+    ) -> TokenManager:
+        """Finish the authorization for `state` with the callback's code or error."""
+        pending = self._finish(state)
+        if pending is None:
+            raise OnboardingError("Unknown or expired authorization state")
+
+        try:
+            if error or not code:
+                raise OnboardingError(f"Authorization denied: {error or 'no code'}")
+            tokens = await self._exchange(pending, code)
+        except OnboardingError as e:
+            if not pending.future.done():
+                pending.future.set_exception(e)
+            raise
+        except Exception as e:
+            # Network and decoding errors surface as OnboardingError too
+            err = OnboardingError(f"Token exchange failed: {e}")
+            if not pending.future.done():
+                pending.future.set_exception(err)
+            raise err from e
+
+        logger.info(f"Account {pending.account_id} authorized")
+        if not pending.future.done():
+            pending.future.set_result(tokens)
+        return tokens
+
+    async def handle_callback(self, query: Mapping[str, str]) -> Tuple[int, str]:
+        """Handle redirect query parameters; return (HTTP status, HTML body)."""
+        try:
+            await self.complete(query.get("state", ""), query.get("code"), query.get("error"))
+        except OnboardingError as e:
+            logger.warning(f"Onboarding callback failed: {e}")
+            return 400, (
+                "<html><body><h2>Authorization failed</h2>"
+                f"<p>{html.escape(str(e))}</p></body></html>"
+            )
+        return 200, (
+            "<html><body><h2>Authorization successful</h2>"
+            "<p>You can close this window.</p></body></html>"
+        )
+
+    async def aiohttp_handler(self, request):
+        """aiohttp route handler for the redirect URI."""
+        from aiohttp import web
+
+        status, body = await self.handle_callback(request.query)
+        return web.Response(status=status, text=body, content_type="text/html")
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def aclose(self) -> None:
+        """Cancel outstanding authorizations and close the HTTP client if owned."""
+        for state in list(self._pending):
+            pending = self._finish(state)
+            if pending is not None and not pending.future.done():
+                pending.future.cancel()
+        if self._owns_http_client:
+            await self.http_client.aclose()
@@ -0,0 +1,169 @@
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict
+import httpx
+from .api_client import VolvoAPIClient
+from .tokens import TokenManager, TokenStore
+from .ratelimit import RateLimiter
+from .cache import TTLCache
+from .quota import QuotaLedger
+from .concurrency import AdaptiveLimiter
+
+
+class _Account:
+    """Registration data kept for every account, live or evicted."""
+
+    __slots__ = ("client_id", "client_secret", "api_key", "tokens", "rate_limiter")
+
+    def __init__(
+        self,
+        client_id: Optional[str],
+        client_secret: Optional[str],
+        api_key: Optional[str],
+        tokens: TokenManager,
+        rate_limiter: RateLimiter,
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.api_key = api_key
+        self.tokens = tokens
+        self.rate_limiter = rate_limiter
+
+
+class VolvoClientPool:
+    """Per-account `VolvoAPIClient`s sharing one HTTP transport.
+
+    Every account keeps its own token manager, rate limiter and cache
+    partition. Only `max_active` clients are kept alive; the least recently
+    used one is evicted (dropping its cache) and rebuilt on the next access.
+    Tokens and the rate-limit budget survive eviction and re-registration.
+    """
+
+    def __init__(
+        self,
+        max_active: int = 1000,
+        rate: float = 5.0,
+        burst: int = 5,
+        cache_ttl: float = 30.0,
+        cache_size: int = 64,
+        max_connections: int = 100,
+        http_client: Optional[httpx.AsyncClient] = None,
+        token_store: Optional[TokenStore] = None,
+        quota: Optional[QuotaLedger] = None,
+        read_limiter: Optional[AdaptiveLimiter] = None,
+        command_limiter: Optional[AdaptiveLimiter] = None,
+    ):
+        self.max_active = max_active
+        self.rate = rate
+        self.burst = burst
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            )
+        )
+        self.token_store = token_store or TokenStore()
+        self.quota = quota
+        # Concurrency limits apply to the shared upstream, across all accounts
+        self.read_limiter = read_limiter
+        self.command_limiter = command_limiter
+        self._accounts: Dict[str, _Account] = {}
+        self._active: "OrderedDict[str, VolvoAPIClient]" = OrderedDict()
+        self.logger = logging.getLogger(__name__)
+
+    def register(
+        self,
+        account_id: str,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        api_key: Optional[str] = None,
+        access_token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+    ) -> TokenManager:
+        """Register an account; missing credentials fall back to `config`."""
+        account = self._accounts.get(account_id)
+        if account is None:
+            account = _Account(
+                client_id,
+                client_secret,
+                api_key,
+                self.token_store.get(account_id),
+                RateLimiter(self.rate, self.burst),
+            )
+            self._accounts[account_id] = account
+        else:
+            account.client_id = client_id or account.client_id
+            account.client_secret = client_secret or account.client_secret
+            account.api_key = api_key or account.api_key
+            self._active.pop(account_id, None)
+        if access_token:
+            account.tokens.access_token = access_token
+        if refresh_token:
+            account.tokens.refresh_token = refresh_token
+        return account.tokens
+
+    def unregister(self, account_id: str) -> None:
+        """Forget an account and its tokens."""
+        account = self._accounts.pop(account_id, None)
+        self._active.pop(account_id, None)
+        if account is not None:
+            # Clients still held by callers must stop sending the tokens
+            account.tokens.clear()
+        self.token_store.remove(account_id)
+
+    def get(self, account_id: str) -> VolvoAPIClient:
+        """Return the client for `account_id`, building it if it was evicted."""
+        client = self._active.get(account_id)
+        if client is not None:
+            self._active.move_to_end(account_id)
+            return client
+
+        account = self._accounts.get(account_id)
+        if account is None:
+            raise KeyError(f"Unknown account: {account_id}")
+
+        client = VolvoAPIClient(
+            client_id=account.client_id,
+            client_secret=account.client_secret,
+            api_key=account.api_key,
+            http_client=self.http_client,
+            token_manager=account.tokens,
+            rate_limiter=account.rate_limiter,
+            cache=TTLCache(self.cache_ttl, self.cache_size),
+            quota=self.quota,
+            tenant=account_id,
+            read_limiter=self.read_limiter,
+            command_limiter=self.command_limiter,
+        )
+        self._active[account_id] = client
+        while len(self._active) > self.max_active:
+            evicted, _ = self._active.popitem(last=False)
+            self.logger.debug(f"Evicted idle account {evicted}")
+        return client
+
+    def __contains__(self, account_id: str) -> bool:
+        return account_id in self._accounts
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active)
+
+    async def aclose(self) -> None:
+        """Close the shared transport if the pool created it."""
+        self._active.clear()
+        if self.quota is not None:
+            await self.quota.flush()
+        if self._owns_http_client:
+            await self.http_client.aclose()
+
+    async def __aenter__(self) -> "VolvoClientPool":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
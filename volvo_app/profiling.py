@@ -0,0 +1,251 @@
+"""
+Runtime diagnostics: event loop lag monitoring and an on-demand sampling
+profiler.
+
+Both are off until asked for. The profiler can be toggled with a signal
+(``kill -USR2 <pid>``) or through the admin endpoint, which also switches
+span tracing on and off.
+"""
+
+import asyncio
+import logging
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Optional, Dict, Any, Tuple, Deque
+from .tracing import Tracer, RingBufferExporter, tracer as default_tracer
+from .concurrency import AdaptiveLimiter
+
+
+logger = logging.getLogger(__name__)
+
+
+class LagMonitor:
+    """Measure how late the event loop wakes up from short sleeps.
+
+    A lag above `threshold` means something blocked the loop; it is logged
+    and, while tracing is on, exported as a "loop.lag" span.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.05,
+        threshold: float = 0.1,
+        history: Optional[int] = 1000,
+        tracer: Tracer = default_tracer,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.tracer = tracer
+        self.lags: Deque[float] = deque(maxlen=history)
+        self.max_lag = 0.0
+        self.stalls = 0
+
+    async def run(self) -> None:
+        """Sample until cancelled."""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.stalls += 1
+                logger.warning(f"Event loop blocked for {lag * 1000:.1f} ms")
+                end_ns = time.time_ns()
+                self.tracer.record("loop.lag", end_ns - int(lag * 1e9), end_ns)
+
+    def stats(self) -> Dict[str, float]:
+        recent = sorted(self.lags)
+        return {
+            "samples": len(recent),
+            "p50_ms": round(recent[len(recent) // 2] * 1000, 3) if recent else 0.0,
+            "max_ms": round(self.max_lag * 1000, 3),
+            "stalls": self.stalls,
+        }
+
+
+class SamplingProfiler:
+    """Sample one thread's Python stack every `interval` seconds.
+
+    Samples are aggregated as collapsed stacks ("outer;inner" -> count), the
+    input format of flame graph tools. Nothing runs while it is stopped.
+
+    By default the thread running the current event loop is sampled, or the
+    main thread when created outside a loop. `VolvoSyncClient` runs its loop
+    in a background thread; pass its `loop_thread_id` to profile that.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        if thread_id is None:
+            try:
+                asyncio.get_running_loop()
+                thread_id = threading.get_ident()
+            except RuntimeError:
+                thread_id = threading.main_thread().ident
+        self.thread_id = thread_id
+        self.stacks: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self.stacks.clear()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample, name="volvo-profiler", daemon=True
+        )
+        self._thread.start()
+        logger.info("Sampling profiler started")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        logger.info(f"Sampling profiler stopped after {sum(self.stacks.values())} samples")
+
+    def toggle(self) -> bool:
+        """Start or stop the profiler; return whether it is now running."""
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+        return self.running
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Return samples in collapsed-stack format, one stack per line."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, n: int = 10) -> Dict[str, int]:
+        """Return the `n` functions most often on top of the stack."""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return dict(leaves.most_common(n))
+
+    def dump(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+
+
+def install_signal_toggle(
+    profiler: SamplingProfiler,
+    path: Optional[str] = None,
+    signum: int = signal.SIGUSR2,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+) -> None:
+    """Toggle `profiler` on `signum`; when it stops, write samples to `path`.
+
+    The handler is registered on `loop` (default: the running loop) and
+    stops, dumps and logs on a worker thread so the loop is not held up.
+    Remove it with ``loop.remove_signal_handler(signum)``.
+    """
+    loop = loop or asyncio.get_running_loop()
+    lock = asyncio.Lock()
+    tasks = set()
+
+    async def toggle():
+        async with lock:
+            if not await asyncio.to_thread(profiler.toggle) and path:
+                await asyncio.to_thread(profiler.dump, path)
+                logger.info(f"Profile written to {path}")
+
+    def handler():
+        task = loop.create_task(toggle())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    loop.add_signal_handler(signum, handler)
+
+
+class DiagnosticsAdmin:
+    """Admin actions for switching tracing and profiling at runtime.
+
+    Without a `buffer`, one is created and added to `tracer`; `close`
+    removes it again.
+    """
+
+    def __init__(
+        self,
+        profiler: Optional[SamplingProfiler] = None,
+        monitor: Optional[LagMonitor] = None,
+        buffer: Optional[RingBufferExporter] = None,
+        tracer: Tracer = default_tracer,
+        limiters: Optional[Dict[str, AdaptiveLimiter]] = None,
+    ):
+        self.profiler = profiler or SamplingProfiler()
+        self.monitor = monitor
+        self.limiters = limiters or {}
+        self.tracer = tracer
+        self.buffer = buffer
+        self._owns_buffer = buffer is None
+        if buffer is None:
+            self.buffer = RingBufferExporter()
+            tracer.add_exporter(self.buffer)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "tracing": self.tracer.enabled,
+            "profiling": self.profiler.running,
+            "spans": self.buffer.summary(),
+            "loop": self.monitor.stats() if self.monitor else None,
+            "concurrency": {name: l.metrics() for name, l in self.limiters.items()},
+        }
+
+    def handle(self, action: str) -> Tuple[int, Any]:
+        """Run `action`; return (HTTP status, JSON-serialisable body)."""
+        if action == "trace/on":
+            self.tracer.enable()
+        elif action == "trace/off":
+            self.tracer.disable()
+        elif action == "profile/start":
+            self.profiler.start()
+        elif action == "profile/stop":
+            return self._stop_profile()
+        elif action != "status":
+            return 404, {"error": f"Unknown action: {action}"}
+        return 200, self.status()
+
+    def _stop_profile(self) -> Tuple[int, Any]:
+        self.profiler.stop()
+        return 200, {"top": self.profiler.top(), "collapsed": self.profiler.collapsed()}
+
+    async def ahandle(self, action: str) -> Tuple[int, Any]:
+        """Like `handle`, but stop the profiler and build its report on a worker thread."""
+        if action == "profile/stop":
+            return await asyncio.to_thread(self._stop_profile)
+        return self.handle(action)
+
+    async def aiohttp_handler(self, request):
+        """aiohttp route handler, e.g. for ``/admin/diagnostics/{action:.*}``."""
+        from aiohttp import web
+
+        status, body = await self.ahandle(request.match_info.get("action") or "status")
+        return web.json_response(body, status=status)
+
+    def close(self) -> None:
+        """Stop profiling and remove the span buffer this admin added to the tracer."""
+        self.profiler.stop()
+        if self._owns_buffer and self.buffer in self.tracer.exporters:
+            self.tracer.remove_exporter(self.buffer)
@@ -0,0 +1,223 @@
+"""
+Daily API quota accounting.
+
+`QuotaLedger` counts every upstream call by endpoint, VIN, tenant and caller
+tag, projects the day's total from the recent call rate and enforces the
+budget. Pollers should ask `recommended_interval` how often they may run, so
+polling slows down gradually before the quota runs out; a slice of the budget
+is reserved for vehicle commands.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+from typing import Optional, Dict, Callable, Deque, Iterator, Tuple
+from .config import config
+
+
+_caller_tag: contextvars.ContextVar = contextvars.ContextVar("volvo_quota_tag", default="")
+_VEHICLE_RE = re.compile(r"(/vehicles/)[^/]+")
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExceededError(Exception):
+    """Raised when a call would exceed the daily API quota."""
+
+
+def _endpoint(method: str, path: str) -> Tuple[str, str]:
+    """Return (normalised endpoint, VIN) for a request path."""
+    path = path.split("?", 1)[0]
+    match = _VEHICLE_RE.search(path)
+    vin = path[match.start() + len(match.group(1)):match.end()] if match else ""
+    template = _VEHICLE_RE.sub(r"\1{vin}", path)
+    return f"{method} {template}", vin
+
+
+@contextmanager
+def quota_tag(tag: str) -> Iterator[None]:
+    """Attribute calls made inside the block to caller `tag`."""
+    token = _caller_tag.set(tag)
+    try:
+        yield
+    finally:
+        _caller_tag.reset(token)
+
+
+class QuotaLedger:
+    """Count upstream calls against a daily quota (UTC days)."""
+
+    def __init__(
+        self,
+        daily_limit: Optional[int] = None,
+        path: Optional[str] = None,
+        command_reserve: float = 0.05,
+        window: float = 3600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.daily_limit = daily_limit or config.VOLVO_API_DAILY_QUOTA
+        self.path = path
+        self.command_reserve = command_reserve
+        self.window = window
+        self.clock = clock
+        self.counts: Counter = Counter()
+        self.used = 0
+        self._day = self._today()
+        # Per-minute call counts over the forecasting window
+        self._minutes: Deque[Tuple[int, int]] = deque()
+        self._dirty = False
+        if path and os.path.exists(path):
+            self.load()
+
+    def _today(self) -> str:
+        return datetime.fromtimestamp(self.clock(), timezone.utc).strftime("%Y-%m-%d")
+
+    def _seconds_left(self) -> float:
+        now = datetime.fromtimestamp(self.clock(), timezone.utc)
+        midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (midnight - now).total_seconds()
+
+    def _roll(self) -> None:
+        day = self._today()
+        if day != self._day:
+            logger.info(f"Quota day {self._day} closed with {self.used} calls")
+            self._day = day
+            self.counts.clear()
+            self.used = 0
+            self._dirty = True
+
+    @property
+    def remaining(self) -> int:
+        self._roll()
+        return max(0, self.daily_limit - self.used)
+
+    def check(self, command: bool = False) -> None:
+        """Raise QuotaExceededError if a new call is not within budget.
+
+        Reads stop once only the command reserve is left.
+        """
+        reserve = 0 if command else int(self.daily_limit * self.command_reserve)
+        if self.remaining <= reserve:
+            raise QuotaExceededError(
+                f"Daily API quota exhausted ({self.used}/{self.daily_limit})"
+            )
+
+    def record(self, method: str, path: str, tenant: str = "") -> None:
+        """Count one upstream call."""
+        self._roll()
+        endpoint, vin = _endpoint(method, path)
+        self.counts[(endpoint, vin, tenant, _caller_tag.get())] += 1
+        self.used += 1
+        self._dirty = True
+
+        minute = int(self.clock() // 60)
+        if self._minutes and self._minutes[-1][0] == minute:
+            self._minutes[-1] = (minute, self._minutes[-1][1] + 1)
+        else:
+            self._minutes.append((minute, 1))
+        self._prune(minute)
+
+    def _prune(self, minute: int) -> None:
+        """Drop per-minute counts that fell out of the forecasting window."""
+        horizon = minute - int(self.window // 60)
+        while self._minutes and self._minutes[0][0] <= horizon:
+            self._minutes.popleft()
+
+    def rate(self) -> float:
+        """Return recent calls per second."""
+        now = self.clock()
+        self._prune(int(now // 60))
+        if not self._minutes:
+            return 0.0
+        span = min(self.window, now - self._minutes[0][0] * 60)
+        return sum(count for _, count in self._minutes) / max(span, 60.0)
+
+    def forecast(self) -> float:
+        """Project today's total calls at the recent rate."""
+        self._roll()
+        return self.used + self.rate() * self._seconds_left()
+
+    def usage(self, by: str = "endpoint") -> Counter:
+        """Aggregate today's calls by "endpoint", "vin", "tenant" or "tag"."""
+        index = ("endpoint", "vin", "tenant", "tag").index(by)
+        self._roll()
+        totals: Counter = Counter()
+        for key, count in self.counts.items():
+            totals[key[index]] += count
+        return totals
+
+    def recommended_interval(self, base_interval: float) -> float:
+        """Stretch a polling interval so the projected burn fits the budget.
+
+        Returns `base_interval` while the forecast is within the quota and
+        grows it in proportion to the projected overshoot otherwise.
+        """
+        budget = self.remaining - int(self.daily_limit * self.command_reserve)
+        if budget <= 0:
+            return max(base_interval, self._seconds_left())
+        demand = self.rate() * self._seconds_left()
+        if demand <= budget:
+            return base_interval
+        return base_interval * demand / budget
+
+    def snapshot(self) -> Dict:
+        return {
+            "day": self._day,
+            "daily_limit": self.daily_limit,
+            "used": self.used,
+            "counts": [list(key) + [count] for key, count in self.counts.items()],
+            "minutes": [list(bucket) for bucket in self._minutes],
+        }
+
+    def _write(self, snapshot: Dict) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def save(self) -> None:
+        """Write the ledger to `path` atomically, if anything changed."""
+        if not self.path or not self._dirty:
+            return
+        self._write(self.snapshot())
+        self._dirty = False
+
+    async def flush(self) -> None:
+        """Like `save`, but write the file on a worker thread."""
+        if not self.path or not self._dirty:
+            return
+        snapshot = self.snapshot()
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._write, snapshot)
+        except OSError as e:
+            self._dirty = True
+            logger.error(f"Error saving quota ledger: {e}")
+
+    async def run(self, interval: float = 60.0) -> None:
+        """Flush the ledger every `interval` seconds until cancelled."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await self.flush()
+        finally:
+            self.save()
+
+    def load(self) -> None:
+        """Restore today's counts from `path`; older days are ignored."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("day") != self._today():
+            return
+        self.counts = Counter({tuple(row[:4]): row[4] for row in data.get("counts", [])})
+        self.used = data.get("used", sum(self.counts.values()))
+        # Recent traffic, so the forecast is meaningful right after a restart
+        self._minutes = deque(tuple(bucket) for bucket in data.get("minutes", []))
+        self._prune(int(self.clock() // 60))
@@ -0,0 +1,144 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Optional, Dict, Any, Callable, Awaitable, TypeVar, Set
+from .api_client import VolvoAPIClient
+from .pool import VolvoClientPool
+
+
+T = TypeVar("T")
+
+
+class VolvoSyncClient:
+    """Blocking facade over `VolvoAPIClient` for synchronous code.
+
+    A single event loop runs in a daemon thread for the lifetime of the
+    facade, so every call reuses the same pooled HTTP connections. Methods
+    may be called from any number of threads at once.
+
+    A call that exceeds `timeout` is cancelled on the loop, so a timed-out
+    command is not sent after the caller was told it failed. `close` waits up
+    to `timeout` for calls in flight and cancels the rest.
+    """
+
+    def __init__(
+        self,
+        pool: Optional[VolvoClientPool] = None,
+        account_id: str = "default",
+        timeout: Optional[float] = None,
+    ):
+        self.account_id = account_id
+        self.timeout = timeout
+        self._owns_pool = pool is None
+        self._pool = pool or VolvoClientPool()
+        if account_id not in self._pool:
+            self._pool.register(account_id)
+
+        self.logger = logging.getLogger(__name__)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="volvo-sync-client", daemon=True
+        )
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._pending: Set[concurrent.futures.Future] = set()
+        self._thread.start()
+
+    @property
+    def loop_thread_id(self) -> Optional[int]:
+        """Ident of the thread running the event loop, e.g. for `SamplingProfiler`."""
+        return self._thread.ident
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def call(self, fn: Callable[[VolvoAPIClient], Awaitable[T]]) -> T:
+        """Run `fn(client)` on the background loop and wait for its result."""
+        if threading.get_ident() == self._thread.ident:
+            raise RuntimeError("VolvoSyncClient cannot be called from its own event loop")
+
+        async def runner():
+            return await fn(self._pool.get(self.account_id))
+
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("VolvoSyncClient is closed")
+            future = asyncio.run_coroutine_threadsafe(runner(), self._loop)
+            self._pending.add(future)
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+        finally:
+            with self._close_lock:
+                self._pending.discard(future)
+
+    def authenticate(self) -> bool:
+        """Authenticate with Volvo API using OAuth2."""
+        return self.call(lambda client: client.authenticate())
+
+    def get_vehicles(self) -> Optional[Dict[str, Any]]:
+        """Get list of vehicles associated with the account."""
+        return self.call(lambda client: client.get_vehicles())
+
+    def get_vehicle_status(self, vin: str) -> Optional[Dict[str, Any]]:
+        """Get current status of a specific vehicle."""
+        return self.call(lambda client: client.get_vehicle_status(vin))
+
+    def lock_vehicle(self, vin: str) -> bool:
+        """Lock the specified vehicle."""
+        return self.call(lambda client: client.lock_vehicle(vin))
+
+    def unlock_vehicle(self, vin: str) -> bool:
+        """Unlock the specified vehicle."""
+        return self.call(lambda client: client.unlock_vehicle(vin))
+
+    def start_engine(self, vin: str) -> bool:
+        """Start the engine of the specified vehicle."""
+        return self.call(lambda client: client.start_engine(vin))
+
+    def stop_engine(self, vin: str) -> bool:
+        """Stop the engine of the specified vehicle."""
+        return self.call(lambda client: client.stop_engine(vin))
+
+    async def _shutdown(self) -> None:
+        """Cancel whatever still runs on the loop, then close the pool if owned."""
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._owns_pool:
+            await self._pool.aclose()
+
+    def close(self) -> None:
+        """Finish or cancel calls in flight, close the pool (if owned) and stop the loop."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            pending = set(self._pending)
+
+        _, unfinished = concurrent.futures.wait(pending, timeout=self.timeout)
+        for future in unfinished:
+            future.cancel()
+        if unfinished:
+            self.logger.warning(f"Cancelled {len(unfinished)} calls still running at close")
+
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        try:
+            future.result(self.timeout)
+        except Exception as e:
+            self.logger.error(f"Error closing client pool: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self) -> "VolvoSyncClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
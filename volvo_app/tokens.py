@@ -0,0 +1,76 @@
+import asyncio
+import time
+from typing import Optional, Dict, Any
+
+
+class TokenManager:
+    """Holds the OAuth2 tokens of a single Volvo ID account."""
+
+    def __init__(
+        self,
+        access_token: Optional[str] = None,
+        refresh_token: Optional[str] = None,
+        expires_at: Optional[float] = None,
+    ):
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """Lock serialising authentication and refresh for this account."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def is_expired(self, skew: float = 30.0) -> bool:
+        """Return True if there is no token or it expires within `skew` seconds."""
+        if not self.access_token:
+            return True
+        if self.expires_at is None:
+            return False
+        return time.time() + skew >= self.expires_at
+
+    def update(self, token_response: Dict[str, Any]) -> None:
+        """Store tokens from an OAuth2 token endpoint response."""
+        self.access_token = token_response.get("access_token")
+        if token_response.get("refresh_token"):
+            self.refresh_token = token_response["refresh_token"]
+        expires_in = token_response.get("expires_in")
+        self.expires_at = time.time() + float(expires_in) if expires_in else None
+
+    def clear(self) -> None:
+        """Forget all tokens."""
+        self.access_token = None
+        self.refresh_token = None
+        self.expires_at = None
+
+
+class TokenStore:
+    """In-memory registry of token managers keyed by account id."""
+
+    def __init__(self):
+        self._managers: Dict[str, TokenManager] = {}
+
+    def get(self, account_id: str) -> TokenManager:
+        """Return the token manager for `account_id`, creating it if needed."""
+        manager = self._managers.get(account_id)
+        if manager is None:
+            manager = self._managers[account_id] = TokenManager()
+        return manager
+
+    def save(self, account_id: str, token_response: Dict[str, Any]) -> TokenManager:
+        """Store an OAuth2 token endpoint response for `account_id`."""
+        manager = self.get(account_id)
+        manager.update(token_response)
+        return manager
+
+    def remove(self, account_id: str) -> None:
+        self._managers.pop(account_id, None)
+
+    def __contains__(self, account_id: str) -> bool:
+        return account_id in self._managers
+
+    def __len__(self) -> int:
+        return len(self._managers)
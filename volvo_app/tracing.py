@@ -0,0 +1,268 @@
+"""
+Span-style timing of the request pipeline.
+
+Code under measurement wraps each stage in ``tracer.span(name)``. While the
+global `tracer` is disabled this returns a shared no-op object, so the hooks
+cost one attribute check. Once enabled, finished spans are passed to every
+registered exporter:
+
+    tracer.add_exporter(RingBufferExporter())
+    tracer.enable()
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import random
+import time
+from collections import deque
+from typing import Optional, Dict, Any, List, Deque
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("volvo_span", default=None)
+
+
+class Span:
+    """One timed stage; times are wall-clock nanoseconds."""
+
+    __slots__ = (
+        "tracer", "name", "trace_id", "span_id", "parent_id",
+        "start_ns", "end_ns", "attributes", "error", "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        parent = _current_span.get()
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent else random.getrandbits(128)
+        self.span_id = random.getrandbits(64)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds."""
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._export(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": f"{self.trace_id:032x}",
+            "span_id": f"{self.span_id:016x}",
+            "parent_id": f"{self.parent_id:016x}" if self.parent_id else None,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is off."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Create spans and hand finished ones to exporters."""
+
+    def __init__(self):
+        self.enabled = False
+        self.exporters: List[Any] = []
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def add_exporter(self, exporter) -> None:
+        """Register an object with an `export(span)` method."""
+        self.exporters.append(exporter)
+
+    def remove_exporter(self, exporter) -> None:
+        self.exporters.remove(exporter)
+
+    def span(self, name: str, **attributes: Any):
+        """Return a context manager timing `name` as a child of the current span."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def record(self, name: str, start_ns: int, end_ns: int, **attributes: Any) -> None:
+        """Export a span for a stage that was timed after the fact."""
+        if not self.enabled:
+            return
+        span = Span(self, name, attributes)
+        span.start_ns = start_ns
+        span.end_ns = end_ns
+        self._export(span)
+
+    def _export(self, span: Span) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.error(f"Span exporter {type(exporter).__name__} failed: {e}")
+
+
+# Process-wide tracer used by the client and pipeline code
+tracer = Tracer()
+
+
+class RingBufferExporter:
+    """Keep the most recent `maxlen` spans in memory."""
+
+    def __init__(self, maxlen: int = 10000):
+        self.buffer: Deque[Span] = deque(maxlen=maxlen)
+
+    def export(self, span: Span) -> None:
+        self.buffer.append(span)
+
+    def spans(self, name: Optional[str] = None) -> List[Span]:
+        return [s for s in self.buffer if name is None or s.name == name]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return count, total and max seconds per span name."""
+        stats: Dict[str, Dict[str, float]] = {}
+        for span in self.buffer:
+            entry = stats.setdefault(span.name, {"count": 0, "total": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["total"] += span.duration
+            entry["max"] = max(entry["max"], span.duration)
+        return stats
+
+    def clear(self) -> None:
+        self.buffer.clear()
+
+
+class JSONFileExporter:
+    """Append spans to a file as newline-delimited JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        self._file.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPExporter:
+    """Batch spans and POST them as OTLP/HTTP JSON to an OpenTelemetry collector.
+
+    Spans are only buffered by `export`; call `flush` (or run `run`) from
+    the event loop to ship them.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = "http://localhost:4318/v1/traces",
+        service_name: str = "volvo-app",
+        max_buffer: int = 10000,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._buffer: Deque[Span] = deque(maxlen=max_buffer)
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or httpx.AsyncClient()
+
+    def export(self, span: Span) -> None:
+        self._buffer.append(span)
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        """Build an OTLP ExportTraceServiceRequest in its JSON encoding."""
+        return {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": self.service_name}},
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [{
+                    "traceId": f"{s.trace_id:032x}",
+                    "spanId": f"{s.span_id:016x}",
+                    "parentSpanId": f"{s.parent_id:016x}" if s.parent_id else "",
+                    "name": s.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [
+                        {"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()
+                    ],
+                    "status": {"code": 2, "message": s.error} if s.error else {},
+                } for s in spans],
+            }],
+        }]}
+
+    async def flush(self) -> int:
+        """Send buffered spans; return how many were sent."""
+        spans = list(self._buffer)
+        self._buffer.clear()
+        if not spans:
+            return 0
+        try:
+            response = await self.http_client.post(self.endpoint, json=self.payload(spans))
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.error(f"Error exporting {len(spans)} spans: {e}")
+            return 0
+        return len(spans)
+
+    async def run(self, interval: float = 5.0) -> None:
+        """Flush every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def aclose(self) -> None:
+        await self.flush()
+        if self._owns_http_client:
+            await self.http_client.aclose()
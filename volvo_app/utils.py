@@ -0,0 +1,13 @@
+from typing import Dict, Any
+
+
+def flatten_dict(data: Dict[str, Any], prefix: str = "", sep: str = ".") -> Dict[str, Any]:
+    """Flatten nested dicts into a single level with dotted keys."""
+    flat: Dict[str, Any] = {}
+    for key, value in data.items():
+        name = f"{prefix}{sep}{key}" if prefix else str(key)
+        if isinstance(value, dict) and value:
+            flat.update(flatten_dict(value, name, sep))
+        else:
+            flat[name] = value
+    return flat